@@ -1,3 +1,5 @@
+import os
+
 import streamlit as st
 
 # Hardcoded credentials 
@@ -7,6 +9,8 @@ CREDENTIALS = {
     "Agasteen": "Agasteen123",
     "Deepika": "Deepika123"
 }
+# Users who see the profiler panel, e.g. DASHBOARD_ADMINS="name1,name2"; nobody when unset
+ADMINS = set(filter(None, os.environ.get("DASHBOARD_ADMINS", "").split(",")))
 
 def login():
     col1, col2, col3 = st.columns([1, 2, 1])
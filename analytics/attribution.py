@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+
+from analytics.session_index import expand_ranges
+from dataset import requires
+from schema import fill_label
+
+ATTRIBUTION_MODELS = {
+    "last_touch": "Last touch",
+    "first_touch": "First touch",
+    "linear": "Linear",
+    "time_decay": "Time decay",
+    "position_based": "Position based (40/20/40)",
+}
+# Half-life of a touch's weight in the time-decay model
+HALF_LIFE_DAYS = 7
+
+
+class Touchpoints:
+    """Every user's sessions sorted by (user, session_created_at), with per-user offsets.
+
+    A sort key packs the dense user index into the high 32 bits and the
+    seconds since the first session into the low 32 bits, so "the user's
+    touches before time t" is a single searchsorted for all orders at once.
+    """
+
+    def __init__(self, sessions):
+        sessions = sessions[sessions["user_id"].notna() & sessions["session_created_at"].notna()]
+        users = sessions["user_id"].to_numpy(dtype=np.int64)
+        seconds = sessions["session_created_at"].to_numpy().astype("datetime64[s]").astype(np.int64)
+        self.base = int(seconds.min()) if len(seconds) else 0
+        order = np.lexsort((sessions["website_session_id"].to_numpy(dtype=np.int64), seconds, users))
+
+        self.sessions = sessions
+        self.order = order
+        self.seconds = seconds[order] - self.base
+        self.user_ids, self.starts = np.unique(users[order], return_index=True)
+        user_idx = np.repeat(np.arange(len(self.user_ids)), np.diff(np.append(self.starts, len(order))))
+        self.keys = (user_idx << 32) | self.seconds
+
+    def channel(self, by):
+        # Category codes in touch order, plus their labels; untagged sessions count as direct
+        values = pd.Categorical(fill_label(self.sessions[by], "Direct"))
+        return values.codes[self.order], values.categories
+
+    def ranges(self, user_ids, seconds):
+        """[start, end) touch positions of each user's sessions up to `seconds` (inclusive)."""
+        user_ids = np.asarray(user_ids, dtype=np.int64)
+        loc = np.minimum(np.searchsorted(self.user_ids, user_ids), max(len(self.user_ids) - 1, 0))
+        found = self.user_ids[loc] == user_ids if len(self.user_ids) else np.zeros(len(user_ids), dtype=bool)
+        start = self.starts[loc]
+        end = np.searchsorted(self.keys, (loc << 32) | np.clip(seconds - self.base, 0, None), side="right")
+        end = np.where(found, np.maximum(end, start), start)
+        return start, end
+
+
+def _weights(model, touch, length, age_days):
+    # `touch` is the 0-based position of a touch within its order, `length` that order's touch count
+    if model == "first_touch":
+        return (touch == 0).astype(float)
+    if model == "last_touch":
+        return (touch == length - 1).astype(float)
+    if model == "linear":
+        return 1.0 / length
+    if model == "time_decay":
+        return np.exp2(-age_days / HALF_LIFE_DAYS)
+    if model == "position_based":
+        middle = np.where(length > 2, 0.2 / np.maximum(length - 2, 1), 0.0)
+        ends = np.where(length == 1, 1.0, np.where(length == 2, 0.5, 0.4))
+        return np.where((touch == 0) | (touch == length - 1), ends, middle)
+    raise ValueError(f"unknown attribution model: {model}")
+
+
+def attribute(orders, touchpoints, model="last_touch", by="utm_source"):
+    """Order revenue and order counts credited to the `by` channel of each prior session.
+
+    Every order is spread over its user's sessions created up to the order
+    date; weights per order always sum to one. Orders without a matching
+    session are left out.
+    """
+    orders = orders[orders["user_id"].notna()]
+    order_seconds = orders["order_date"].to_numpy().astype("datetime64[s]").astype(np.int64)
+    start, end = touchpoints.ranges(orders["user_id"].to_numpy(dtype=np.int64), order_seconds)
+    length = end - start
+
+    positions = expand_ranges(start, end)
+    order_of = np.repeat(np.arange(len(orders)), length)
+    touch = np.arange(len(positions)) - np.repeat(np.cumsum(length) - length, length)
+    age_days = (order_seconds[order_of] - touchpoints.base - touchpoints.seconds[positions]) / 86400
+
+    weight = _weights(model, touch, length[order_of], age_days)
+    # Only time decay needs normalizing, the other models already sum to one per order
+    totals = np.bincount(order_of, weights=weight, minlength=len(orders))
+    weight = weight / totals[order_of]
+
+    codes, labels = touchpoints.channel(by)
+    codes = codes[positions]
+    revenue = orders["price_usd"].to_numpy()[order_of]
+    credited_orders = np.bincount(codes, weights=weight, minlength=len(labels))
+    credited_revenue = np.bincount(codes, weights=weight * revenue, minlength=len(labels))
+
+    result = pd.DataFrame({
+        by: labels,
+        "attributed_orders": credited_orders,
+        "attributed_revenue": credited_revenue,
+    })
+    result = result[result["attributed_orders"] > 0].sort_values("attributed_revenue", ascending=False)
+    result.attrs["unattributed_orders"] = int((length == 0).sum())
+    return result.reset_index(drop=True)
+
+
+@requires(sessions=["website_session_id", "user_id", "session_created_at",
+                   "utm_source", "utm_campaign", "utm_content", "device_type"])
+def touchpoints(dataset):
+    return dataset.derived("touchpoints", lambda ds: Touchpoints(ds.table("sessions")))
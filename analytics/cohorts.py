@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+
+from dataset import requires
+
+COHORT_BASES = {"order": "First order", "session": "First session"}
+COHORT_MEASURES = ["active_users", "orders", "revenue", "margin"]
+
+
+def acquisition(orders, sessions, basis="order"):
+    """Acquisition month and channel of every user, sorted by user_id.
+
+    basis="order" uses the user's first order (orders carry is_first_order),
+    basis="session" the first website session.
+    """
+    if basis == "order":
+        first = orders[orders["is_first_order"]]
+    else:
+        sessions = sessions[sessions["year_month"].notna()]
+        first = sessions.sort_values("session_created_at", kind="stable").drop_duplicates("user_id")
+    # Without a timestamp there is no acquisition month (NaT would be iNaT in asi8)
+    first = first[first["user_id"].notna() & first["year_month"].notna()]
+    acquired = pd.DataFrame({
+        "user_id": first["user_id"].to_numpy(dtype=np.int64),
+        "cohort": first["year_month"].array.asi8,
+        "utm_source": first["utm_source"].to_numpy(),
+    })
+    return acquired.sort_values("user_id", ignore_index=True)
+
+
+class Cohorts:
+    """Cohort x months-since-acquisition matrices of active users, orders, revenue and margin.
+
+    Margin is refund adjusted: price - cogs - refund. Every measure is one
+    bincount over a flat (cohort, age) cell id; cells a cohort has not reached
+    yet are NaN in the frames.
+    """
+
+    def __init__(self, months, sizes, measures):
+        self.months = months
+        self.sizes = sizes
+        self.measures = measures
+
+    @classmethod
+    def build(cls, orders, acquired):
+        users = acquired["user_id"].to_numpy(dtype=np.int64)
+        cohort = acquired["cohort"].to_numpy(dtype=np.int64)
+        orders = orders[orders["user_id"].notna() & orders["year_month"].notna()]
+        if len(users) == 0 or len(orders) == 0:
+            return cls(pd.PeriodIndex([], freq="M"), np.zeros(0, dtype=np.int64), {})
+
+        order_users = orders["user_id"].to_numpy(dtype=np.int64)
+        order_month = orders["year_month"].array.asi8
+        loc = np.minimum(np.searchsorted(users, order_users), len(users) - 1)
+        keep = users[loc] == order_users
+        age = order_month - cohort[loc]
+        keep &= age >= 0
+
+        first = int(cohort.min())
+        n = int(max(cohort.max(), order_month.max())) - first + 1
+        cell = (cohort[loc] - first) * n + age
+        loc, cell = loc[keep], cell[keep]
+
+        refund = orders["refund_amount_usd"].fillna(0).to_numpy()[keep]
+        price = orders["price_usd"].to_numpy()[keep]
+        cogs = orders["cogs_usd"].to_numpy()[keep]
+        # A user counts once per cell however many orders they placed in it
+        active_cells = np.unique(loc * (n * n) + cell) % (n * n)
+        measures = {
+            "active_users": np.bincount(active_cells, minlength=n * n),
+            "orders": np.bincount(cell, minlength=n * n),
+            "revenue": np.bincount(cell, weights=price, minlength=n * n),
+            "margin": np.bincount(cell, weights=price - cogs - refund, minlength=n * n),
+        }
+        months = pd.period_range(pd.Period(ordinal=first, freq="M"), periods=n, freq="M")
+        sizes = np.bincount(cohort - first, minlength=n)
+        return cls(months, sizes, {name: values.reshape(n, n) for name, values in measures.items()})
+
+    def _observed(self):
+        # Cohort c has reached age a when c + a is not past the last month
+        n = len(self.months)
+        return np.add.outer(np.arange(n), np.arange(n)) < n
+
+    def frame(self, measure):
+        """Cohort rows (only cohorts with users) by months since acquisition."""
+        values = np.where(self._observed(), self.measures[measure], np.nan)
+        rows = self.sizes > 0
+        return pd.DataFrame(values[rows], index=self.months[rows].astype(str),
+                            columns=pd.RangeIndex(len(self.months), name="months_since_acquisition"))
+
+    def retention(self):
+        """Share of each cohort active in every month since acquisition, in %."""
+        rows = self.sizes > 0
+        return self.frame("active_users") / self.sizes[rows, None] * 100
+
+    def ltv(self, measure="margin"):
+        """Average cumulative value per acquired user by months since acquisition.
+
+        Each age only averages over cohorts old enough to have reached it.
+        """
+        observed = self._observed()
+        cumulative = np.cumsum(self.measures[measure], axis=1)
+        reached = (observed * self.sizes[:, None]).sum(axis=0)
+        total = np.where(observed, cumulative, 0).sum(axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ltv = np.where(reached > 0, total / reached, np.nan)
+        return pd.DataFrame({
+            "months_since_acquisition": np.arange(len(self.months)),
+            "ltv": ltv,
+            "users": reached,
+        })
+
+
+@requires(orders=["user_id", "order_date", "utm_source"],
+          sessions=["user_id", "session_created_at", "utm_source"])
+def acquisition_for(dataset, basis="order"):
+    return dataset.derived(f"acquisition_{basis}",
+                           lambda ds: acquisition(ds.table("orders"), ds.table("sessions"), basis))
@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+
+from dataset import register_incremental, requires
+
+# Dimensions of the CEO filters (ceo/filter.apply_filters) plus month
+ORDER_DIMS = ["utm_source", "device_type", "product_name", "utm_campaign", "year_month"]
+ORDER_SUMS = ["price_usd", "cogs_usd", "refund_amount_usd", "items_purchased"]
+ORDER_DISTINCT = ["order_id", "user_id", "website_session_id"]
+
+# Sessions have no product, the rest of the grid is the same
+SESSION_DIMS = ["utm_source", "device_type", "utm_campaign", "year_month"]
+SESSION_DISTINCT = ["website_session_id", "user_id"]
+
+
+class Cube:
+    """Pre-aggregated cells of a fact table, one row per combination of dims.
+
+    Additive measures are stored as sums. A distinct measure whose ids each
+    fall in a single cell (an order, a session) stores its per-cell count,
+    which adds up exactly at any grain. Ids spread over several cells (a
+    user buying several products) cannot be added, so those distinct counts
+    are taken from the fact rows of the slice.
+    """
+
+    def __init__(self, cells, dims, sums, distinct, exclusive, source, selections=()):
+        self.cells = cells
+        self.dims = dims
+        self.sums = sums
+        self.distinct = distinct
+        # Distinct measures stored as per-cell counts
+        self.exclusive = exclusive
+        self.source = source
+        self.selections = selections
+        self._rows = None
+
+    @classmethod
+    def build(cls, df, dims, sums, distinct):
+        dims = [d for d in dims if d in df.columns]
+        sums = [m for m in sums if m in df.columns]
+        distinct = [m for m in distinct if m in df.columns]
+
+        # dropna=False keeps rows with a missing label in the totals
+        grouped = df.groupby(dims, observed=True, dropna=False, sort=True)
+        cells = grouped[sums].sum(min_count=0).reset_index() if sums else grouped.size().reset_index()[dims]
+        cell_id = grouped.ngroup().to_numpy()
+
+        exclusive = []
+        for col in distinct:
+            counts, single_cell = _ids_per_cell(cell_id, df[col].array, len(cells))
+            if single_cell:
+                cells[col] = counts
+                exclusive.append(col)
+
+        if "year_month" in cells.columns:
+            cells["year_quarter"] = cells["year_month"].dt.asfreq("Q")
+        return cls(cells, dims, sums, distinct, exclusive, df)
+
+    def slice(self, **selections):
+        # Empty selections mean "all", like the sidebar multiselects
+        selections = {dim: values for dim, values in selections.items() if values}
+        mask = np.ones(len(self.cells), dtype=bool)
+        for dim, values in selections.items():
+            mask &= self.cells[dim].isin(values).to_numpy()
+        return Cube(self.cells[mask], self.dims, self.sums, self.distinct, self.exclusive, self.source,
+                    self.selections + tuple(selections.items()))
+
+    def rows(self):
+        """Fact rows of the slice, filtered on first use."""
+        if self._rows is None:
+            rows = self.source
+            for dim, values in self.selections:
+                rows = rows[rows[dim].isin(values)]
+            self._rows = rows
+        return self._rows
+
+    def rollup(self, by, sums=(), distinct=()):
+        by = list(by)
+        counted = [col for col in distinct if col in self.exclusive]
+        measures = list(sums) + counted
+        result = self.cells.groupby(by, observed=True)[measures].sum() if measures else None
+        for col in distinct:
+            if col not in self.exclusive:
+                rows = self.rows()
+                if "year_quarter" in by and "year_quarter" not in rows.columns:
+                    rows = rows.assign(year_quarter=rows["year_month"].dt.asfreq("Q"))
+                counts = rows.groupby(by, observed=True)[col].nunique()
+                result = counts.to_frame() if result is None else result.join(counts, how="outer")
+        return result[list(sums) + list(distinct)].reset_index()
+
+    def merge(self, other, source):
+        """Fold a cube of appended rows into this one; `source` is the grown fact table.
+
+        Per-cell counts add up like sums only while the two batches share no
+        ids: an appended order of a known session, or a returning user, would
+        be counted twice. Measures failing that check, or single-cell in just
+        one of the cubes, fall back to counting over `source`.
+        """
+        cells = pd.concat([self.cells, other.cells], ignore_index=True)
+        # Disjoint batches: the distinct ids of the grown table are exactly the two sets added up
+        exclusive = [col for col in self.exclusive if col in other.exclusive
+                     and source[col].nunique() == self.cells[col].sum() + other.cells[col].sum()]
+        grouped = cells.groupby(self.dims, observed=True, dropna=False, sort=True)
+        merged = grouped[self.sums + exclusive].sum().reset_index()
+        if "year_month" in merged.columns:
+            merged["year_quarter"] = merged["year_month"].dt.asfreq("Q")
+        return Cube(merged, self.dims, self.sums, self.distinct, exclusive, source)
+
+    def total(self, measure):
+        if measure in self.distinct and measure not in self.exclusive:
+            return self.rows()[measure].nunique()
+        return self.cells[measure].sum()
+
+
+def _ids_per_cell(cell_id, values, n_cells):
+    # Distinct ids per cell, and whether every id sits in a single cell
+    pairs = pd.DataFrame({"cell": cell_id, "value": values}).dropna().drop_duplicates()
+    counts = np.bincount(pairs["cell"].to_numpy(), minlength=n_cells)
+    return counts, not pairs["value"].duplicated().any()
+
+
+def _update_cube(table, dims, sums, distinct):
+    # New rows only go through Cube.build, then merge into the existing cells
+    def update(cube, dataset, name, rows):
+        if name != table:
+            return cube
+        return cube.merge(Cube.build(rows, dims, sums, distinct), dataset.table(table))
+    return update
+
+
+register_incremental("order_cube", _update_cube("orders", ORDER_DIMS, ORDER_SUMS, ORDER_DISTINCT))
+register_incremental("session_cube", _update_cube("sessions", SESSION_DIMS, [], SESSION_DISTINCT))
+
+
+@requires(orders=ORDER_DIMS + ORDER_SUMS + ORDER_DISTINCT)
+def order_cube(dataset):
+    return dataset.derived("order_cube", lambda ds: Cube.build(
+        ds.table("orders"), ORDER_DIMS, ORDER_SUMS, ORDER_DISTINCT))
+
+
+@requires(sessions=SESSION_DIMS + SESSION_DISTINCT)
+def session_cube(dataset):
+    return dataset.derived("session_cube", lambda ds: Cube.build(
+        ds.table("sessions"), SESSION_DIMS, [], SESSION_DISTINCT))
@@ -0,0 +1,40 @@
+import pandas as pd
+
+from schema import to_id
+
+SEQUENCE_COLUMNS = ["order_rank_for_user", "is_first_order", "days_since_previous_order"]
+ORDER_FLAGS = {True: "First Order", False: "Repeat Order"}
+
+
+def add_order_sequence(orders):
+    """Orders with each user's order sequence: rank (1 = first order), first-order flag
+    and days since the user's previous order. Ties on order_date are broken by order_id.
+    """
+    ordered = orders.sort_values(["user_id", "order_date", "order_id"], kind="stable")
+    by_user = ordered.groupby("user_id", observed=True)
+    rank = by_user.cumcount() + 1
+    gap = ordered["order_date"] - by_user["order_date"].shift()
+    # assign aligns on the index, so the original row order is kept
+    return orders.assign(
+        order_rank_for_user=to_id(rank),
+        is_first_order=rank == 1,
+        days_since_previous_order=gap.dt.total_seconds() / 86400,
+    )
+
+
+def extend_order_sequence(orders, rows):
+    """Sequence columns for appended `rows`, continuing the users' history in `orders`."""
+    if "order_rank_for_user" not in orders.columns:
+        return rows
+    keys = ["user_id", "order_date", "order_id"]
+    history = orders.loc[orders["user_id"].isin(rows["user_id"].dropna().unique()), keys]
+    combined = add_order_sequence(pd.concat([history, rows[keys]], ignore_index=True))
+    new = combined.iloc[len(history):]
+    return rows.assign(**{col: new[col].to_numpy() for col in SEQUENCE_COLUMNS})
+
+
+def order_flag_counts(orders):
+    """First vs repeat order counts as a two column frame for the charts."""
+    counts = orders["is_first_order"].value_counts().rename(index=ORDER_FLAGS).reset_index()
+    counts.columns = ["Order Type", "Count"]
+    return counts
@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+
+from analytics.paths import SEPARATOR
+from analytics.session_index import sorted_member
+
+
+class PathTrie:
+    """Prefix tree of session journeys with per-node session, conversion and duration totals.
+
+    Node 0 is the root. A node's counters cover every session whose path starts
+    with the node's prefix; `ended` counts the sessions that stop exactly there.
+    It is built from the interned path dictionary, so its size depends on the
+    number of distinct paths taken in the slice, not on the number of sessions.
+    """
+
+    def __init__(self, pages, parent, depth, sessions, ended, conversions, duration_sum):
+        self.pages = pages
+        self.parent = parent
+        self.depth = depth
+        self.sessions = sessions
+        self.ended = ended
+        self.conversions = conversions
+        self.duration_sum = duration_sum
+        self._children = {}
+        for node in range(1, len(parent)):
+            self._children.setdefault(parent[node], {})[pages[node]] = node
+
+    @classmethod
+    def build(cls, paths, converted_session_ids=()):
+        """`paths` is a session path table from analytics.paths.build_session_paths."""
+        dictionary = paths["pageview_url"].cat.categories
+        path_id = paths["path_id"].to_numpy()
+        converted = sorted_member(np.sort(np.asarray(converted_session_ids, dtype=np.int64)),
+                                  paths["website_session_id"].to_numpy(dtype=np.int64))
+
+        # Per-path totals first, one vectorized pass over the sessions
+        n_paths = len(dictionary)
+        path_sessions = np.bincount(path_id, minlength=n_paths)
+        path_conversions = np.bincount(path_id, weights=converted, minlength=n_paths)
+        path_duration = np.bincount(path_id, weights=paths["session_duration_min"].fillna(0).to_numpy(),
+                                    minlength=n_paths)
+
+        # Insert each distinct path taken by a session of the slice once
+        pages, parent, depth = [""], [-1], [0]
+        lookup = {}
+        terminal = np.zeros(n_paths, dtype=np.int64)
+        for pid in np.flatnonzero(path_sessions):
+            path = dictionary[pid]
+            node = 0
+            for page in path.split(SEPARATOR):
+                child = lookup.get((node, page))
+                if child is None:
+                    child = len(pages)
+                    lookup[(node, page)] = child
+                    pages.append(page)
+                    parent.append(node)
+                    depth.append(depth[node] + 1)
+                node = child
+            terminal[pid] = node
+
+        parent = np.array(parent)
+        depth = np.array(depth)
+        n_nodes = len(pages)
+        ended = np.bincount(terminal, weights=path_sessions, minlength=n_nodes)
+        sessions = ended.copy()
+        conversions = np.bincount(terminal, weights=path_conversions, minlength=n_nodes)
+        duration_sum = np.bincount(terminal, weights=path_duration, minlength=n_nodes)
+
+        # Push totals up one level at a time, deepest first
+        for level in range(depth.max(), 0, -1):
+            nodes = np.flatnonzero(depth == level)
+            for counter in (sessions, conversions, duration_sum):
+                np.add.at(counter, parent[nodes], counter[nodes])
+
+        return cls(np.array(pages, dtype=object), parent, depth, sessions.astype(np.int64),
+                   ended.astype(np.int64), conversions.astype(np.int64), duration_sum)
+
+    def find(self, prefix):
+        node = 0
+        for page in prefix:
+            node = self._children.get(node, {}).get(page)
+            if node is None:
+                return None
+        return node
+
+    def label(self, node):
+        pages = []
+        while node > 0:
+            pages.append(self.pages[node])
+            node = self.parent[node]
+        return SEPARATOR.join(reversed(pages))
+
+    def _frame(self, nodes):
+        nodes = np.asarray(nodes, dtype=np.int64)
+        sessions = self.sessions[nodes]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return pd.DataFrame({
+                "node": nodes,
+                "page": self.pages[nodes],
+                "path": [self.label(n) for n in nodes],
+                "sessions": sessions,
+                "dropped_here": self.ended[nodes],
+                "conversions": self.conversions[nodes],
+                "conversion_rate_pct": np.where(sessions > 0, self.conversions[nodes] / sessions * 100, 0.0),
+                "avg_duration_min": np.where(sessions > 0, self.duration_sum[nodes] / sessions, 0.0),
+            })
+
+    def children(self, node=0):
+        kids = list(self._children.get(node, {}).values())
+        return self._frame(kids).sort_values("sessions", ascending=False, ignore_index=True)
+
+    def drop_off(self, prefix):
+        """Sessions that reached `prefix` and how many left right after its last page."""
+        node = self.find(prefix)
+        if node is None:
+            return None
+        reached = int(self.sessions[node])
+        dropped = int(self.ended[node])
+        return {
+            "reached": reached,
+            "dropped": dropped,
+            "continued": reached - dropped,
+            "drop_off_rate_pct": dropped / reached * 100 if reached else 0.0,
+            "conversions": int(self.conversions[node]),
+        }
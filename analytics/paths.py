@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+
+SEPARATOR = " → "
+
+
+def _intern_sequences(codes, starts, lengths):
+    """Give every distinct code sequence an id, one vectorized step per path position.
+
+    At depth d each session still walking extends its prefix id with its d-th
+    code; np.unique over (prefix, code) pairs names the new prefixes. Total work
+    is one pass over the pageviews, with no Python call per session.
+    Returns the final prefix id of each session and, per prefix id, its parent
+    prefix and last code (the prefix tree of all paths).
+    """
+    n_codes = int(codes.max()) + 1 if len(codes) else 1
+    node = np.zeros(len(starts), dtype=np.int64)
+    parents, last_codes = [np.array([-1])], [np.array([-1])]
+    next_id = 1
+    active = np.arange(len(starts))
+    depth = 0
+    while True:
+        active = active[lengths[active] > depth]
+        if len(active) == 0:
+            break
+        key = node[active] * n_codes + codes[starts[active] + depth]
+        uniq, inverse = np.unique(key, return_inverse=True)
+        node[active] = next_id + inverse
+        parents.append(uniq // n_codes)
+        last_codes.append(uniq % n_codes)
+        next_id += len(uniq)
+        depth += 1
+    return node, np.concatenate(parents), np.concatenate(last_codes)
+
+
+def _prefix_strings(parents, last_codes, urls):
+    # Parents always get a smaller id than their children, so one forward pass builds every prefix
+    strings = np.empty(len(parents), dtype=object)
+    strings[0] = ""
+    for i in range(1, len(parents)):
+        parent = strings[parents[i]]
+        strings[i] = urls[last_codes[i]] if parent == "" else parent + SEPARATOR + urls[last_codes[i]]
+    return strings
+
+
+def short_labels(dictionary, width=60):
+    """Chart labels for a path dictionary, cut to `width` characters."""
+    labels = pd.Series(dictionary, dtype=object)
+    long = labels.str.len() > width
+    labels[long] = labels[long].str.slice(0, width) + '...'
+    return labels.to_numpy()
+
+
+def build_session_paths(pageviews):
+    """One row per session: interned path, start/end and duration in minutes.
+
+    `pageview_url` is a categorical whose categories are the path dictionary,
+    `path_id` is its integer code, so downstream code can group on integers.
+    """
+    pageviews = pageviews[pageviews["website_session_id"].notna() & pageviews["pageview_url"].notna()]
+    session = pageviews["website_session_id"].to_numpy(dtype=np.int64)
+    created = pageviews["created_at"].to_numpy()
+    time_unit = created.dtype
+    created = created.view(np.int64)
+    urls = pd.Categorical(pageviews["pageview_url"])
+
+    order = np.lexsort((created, session))
+    session, created, codes = session[order], created[order], urls.codes[order].astype(np.int64)
+
+    ids, starts = np.unique(session, return_index=True)
+    lengths = np.diff(np.append(starts, len(session)))
+
+    node, parents, last_codes = _intern_sequences(codes, starts, lengths)
+    # Only the prefixes that end a session are paths; name them once each
+    terminal, path_codes = np.unique(node, return_inverse=True)
+    strings = _prefix_strings(parents, last_codes, np.asarray(urls.categories, dtype=object))
+    dictionary = pd.Index(strings[terminal])
+
+    start = np.minimum.reduceat(created, starts) if len(starts) else created[:0]
+    end = np.maximum.reduceat(created, starts) if len(starts) else created[:0]
+    result = pd.DataFrame({
+        "website_session_id": ids.astype(pageviews["website_session_id"].dtype),
+        "pageview_url": pd.Categorical.from_codes(path_codes, dictionary),
+        "session_start": start.view(time_unit),
+        "session_end": end.view(time_unit),
+    })
+    result["session_duration_min"] = (result["session_end"] - result["session_start"]).dt.total_seconds() / 60
+    result["path_id"] = path_codes.astype(np.int32)
+    return result
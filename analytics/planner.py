@@ -0,0 +1,108 @@
+import pandas as pd
+
+# Lookup joins between the dashboard tables, (fact, dimension) -> key. The
+# dimension is unique on the key, so following one never multiplies rows
+JOINS = {
+    ("refunds", "order_items"): "order_item_id",
+    ("order_items", "products"): "product_id",
+    ("orders", "sessions"): "website_session_id",
+}
+
+
+class Query:
+    """What one chart needs: a table, filters, group keys and named aggregates.
+
+    `filters` maps a column to the values to keep (empty means all, like the
+    sidebar multiselects); `aggs` maps an output name to (column, func) as in
+    pandas named aggregation. Columns may live in any table reachable via JOINS.
+    """
+
+    def __init__(self, table, filters=None, by=(), aggs=None):
+        self.table = table
+        self.filters = _filter_key(filters)
+        self.by = tuple(by)
+        self.aggs = tuple((aggs or {}).items())
+
+    @property
+    def key(self):
+        return self.table, self.filters, self.by, self.aggs
+
+
+class Planner:
+    """Runs Queries against the tables of one rerun.
+
+    Predicates on the table's own columns go first, then predicates on joined
+    columns against the rows that are left. Only the columns a query touches
+    are joined, and each one is a key lookup along the JOINS path rather than
+    a merge of whole tables. Filtered scans, key indexes and query results are
+    shared by every chart of the rerun that asks for the same thing.
+    """
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.hits = 0
+        self._memo = {}
+
+    def _cached(self, key, build):
+        if key in self._memo:
+            self.hits += 1
+        else:
+            self._memo[key] = build()
+        return self._memo[key]
+
+    def _path(self, table, column):
+        # Tables from `table` to the first one holding `column`, following JOINS
+        path = [table]
+        while column not in self.tables[path[-1]].columns:
+            step = next((dim for fact, dim in JOINS if fact == path[-1] and dim in self.tables), None)
+            if step is None:
+                raise KeyError(f"{column!r} is not reachable from {table!r}")
+            path.append(step)
+        return path
+
+    def _index(self, table, key):
+        return self._cached(("index", table, key), lambda: pd.Index(self.tables[table][key]))
+
+    def column(self, frame, table, column):
+        """`column` for every row of `frame` (rows of `table`), looked up through JOINS."""
+        path = self._path(table, column)
+        if len(path) == 1:
+            return frame[column]
+        values = frame[JOINS[path[0], path[1]]]
+        for i in range(1, len(path)):
+            positions = self._index(path[i], JOINS[path[i - 1], path[i]]).get_indexer(values)
+            target = column if i == len(path) - 1 else JOINS[path[i], path[i + 1]]
+            dim = path[i]
+            # -1 (no match) becomes a missing value, like a left join
+            values = pd.api.extensions.take(self.tables[dim][target].array, positions, allow_fill=True)
+        return pd.Series(values, index=frame.index, name=column)
+
+    def scan(self, table, filters=None):
+        """Rows of `table` passing `filters`, shared across the rerun."""
+        filters = _filter_key(filters)
+        return self._cached(("scan", table, filters), lambda: self._scan(table, filters))
+
+    def _scan(self, table, filters):
+        frame = self.tables[table]
+        own = [(col, values) for col, values in filters if col in frame.columns]
+        joined = [(col, values) for col, values in filters if col not in frame.columns]
+        for col, values in own:
+            frame = frame[frame[col].isin(values).to_numpy()]
+        for col, values in joined:
+            frame = frame[self.column(frame, table, col).isin(values).to_numpy()]
+        return frame
+
+    def run(self, query):
+        """Grouped aggregates of `query` as a flat frame."""
+        return self._cached(("query",) + query.key, lambda: self._run(query))
+
+    def _run(self, query):
+        frame = self.scan(query.table, query.filters)
+        needed = dict.fromkeys(list(query.by) + [col for _, (col, _) in query.aggs])
+        data = pd.DataFrame({col: self.column(frame, query.table, col) for col in needed}, index=frame.index)
+        return data.groupby(list(query.by), observed=True).agg(**dict(query.aggs)).reset_index()
+
+
+def _filter_key(filters):
+    # Hashable and order independent; empty selections are not predicates
+    return tuple(sorted((col, tuple(values)) for col, values in dict(filters or {}).items() if len(values)))
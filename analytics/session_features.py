@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+
+from analytics.session_index import KEY, order_index, pageview_index, sorted_member, unique_sorted
+from dataset import concat_rows, register_incremental, requires
+
+FEATURE_COLUMNS = ["pageview_count", "is_bounce", "landing_page", "exit_page",
+                   "session_start", "session_end", "session_duration_min", "converted"]
+
+
+def build_session_features(pageviews, session_ids, converted_ids):
+    """One row per id in `session_ids` (sorted, unique), indexed by website_session_id.
+
+    Sessions without pageviews get a count of 0 and no landing/exit page.
+    `converted_ids` is the sorted array of session ids that placed an order.
+    """
+    session_ids = np.asarray(session_ids, dtype=np.int64)
+    pageviews = pageviews[pageviews[KEY].notna()]
+    session = pageviews[KEY].to_numpy(dtype=np.int64)
+    created = pageviews["created_at"].to_numpy()
+    urls = pd.Categorical(pageviews["pageview_url"])
+
+    order = np.lexsort((created, session))
+    session, created, codes = session[order], created[order], urls.codes[order]
+    ids, starts = np.unique(session, return_index=True)
+    ends = np.append(starts[1:], len(session))
+
+    loc = np.minimum(np.searchsorted(ids, session_ids), max(len(ids) - 1, 0))
+    found = ids[loc] == session_ids if len(ids) else np.zeros(len(session_ids), dtype=bool)
+    first, last = starts[loc[found]], ends[loc[found]] - 1
+
+    count = np.zeros(len(session_ids), dtype=np.int32)
+    count[found] = last - first + 1
+    landing = np.full(len(session_ids), -1, dtype=codes.dtype)
+    exit_ = landing.copy()
+    landing[found], exit_[found] = codes[first], codes[last]
+    start = np.full(len(session_ids), np.datetime64("NaT"), dtype=created.dtype)
+    end = start.copy()
+    start[found], end[found] = created[first], created[last]
+
+    features = pd.DataFrame({
+        "pageview_count": count,
+        "is_bounce": count == 1,
+        "landing_page": pd.Categorical.from_codes(landing, urls.categories),
+        "exit_page": pd.Categorical.from_codes(exit_, urls.categories),
+        "session_start": start,
+        "session_end": end,
+    }, index=pd.Index(session_ids, name=KEY))
+    features["session_duration_min"] = (features["session_end"] - features["session_start"]).dt.total_seconds() / 60
+    features["converted"] = sorted_member(converted_ids, session_ids)
+    return features
+
+
+def join_features(sessions, features, columns=FEATURE_COLUMNS):
+    """`sessions` with the feature columns added (or replaced), aligned on website_session_id."""
+    rows = features.reindex(sessions[KEY].to_numpy())[list(columns)]
+    rows.index = sessions.index
+    return sessions.assign(**{col: rows[col] for col in columns})
+
+
+def _all_session_ids(dataset):
+    ids = [pageview_index(dataset).ids]
+    if "sessions" in dataset:
+        ids.append(dataset.table("sessions")[KEY].dropna().to_numpy(dtype=np.int64))
+    return np.unique(np.concatenate(ids))
+
+
+def _build(dataset):
+    return build_session_features(pageview_index(dataset).frame, _all_session_ids(dataset),
+                                  order_index(dataset).ids)
+
+
+def _update(features, dataset, name, rows):
+    # Recompute the touched sessions only, from the (already extended) pageview index
+    if name not in ("pageviews", "sessions", "orders"):
+        return features
+    touched = np.unique(rows[KEY].dropna().to_numpy(dtype=np.int64))
+    if len(touched) == 0:
+        return features
+    fresh = build_session_features(pageview_index(dataset).take(touched), touched, order_index(dataset).ids)
+    kept = features[~sorted_member(touched, features.index.to_numpy())]
+    merged = concat_rows(kept.reset_index(), fresh.reset_index())
+    return merged.sort_values(KEY, kind="stable").set_index(KEY)
+
+
+register_incremental("session_features", _update)
+
+
+@requires(pageviews=[KEY, "created_at", "pageview_url"], sessions=[KEY], orders=[KEY])
+def session_features(dataset):
+    return dataset.derived("session_features", _build)
+
+
+def sessions_between(dataset, start, end):
+    """Sorted ids of the sessions with a pageview between `start` and `end` (both included)."""
+    features = session_features(dataset)
+    ids = features.index.to_numpy()
+    first, last = features["session_start"].to_numpy(), features["session_end"].to_numpy()
+    start, end = np.datetime64(pd.Timestamp(start)), np.datetime64(pd.Timestamp(end))
+    inside = ((first >= start) & (first <= end)) | ((last >= start) & (last <= end))
+    spanning = (first < start) & (last > end)
+    if spanning.any():
+        # Sessions straddling the whole range count only with a pageview inside it
+        views = pageview_index(dataset).take(ids[spanning])
+        created = views["created_at"]
+        hits = unique_sorted(views.loc[(created >= start) & (created <= end), KEY].to_numpy(dtype=np.int64))
+        inside[np.searchsorted(ids, hits)] = True
+    return ids[inside]
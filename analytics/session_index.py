@@ -0,0 +1,170 @@
+import numpy as np
+import pandas as pd
+
+from dataset import concat_rows, register_incremental, requires
+
+KEY = "website_session_id"
+
+# Session columns the sidebars filter on
+SET_COLUMNS = ["utm_source", "utm_campaign", "utm_content", "device_type"]
+
+
+class SessionIndex:
+    """Rows of a table kept sorted by website_session_id, with per-session offsets.
+
+    Selecting the rows of a set of sessions is a binary search plus contiguous
+    slices instead of an isin() hash probe over the whole table.
+    """
+
+    def __init__(self, frame, key=KEY):
+        self.key = key
+        frame = frame[frame[key].notna()]
+        keys = frame[key].to_numpy(dtype=np.int64)
+        order = np.argsort(keys, kind="stable")
+        self.frame = frame.iloc[order].reset_index(drop=True)
+        self.ids, self.starts = np.unique(keys[order], return_index=True)
+        self.ends = np.append(self.starts[1:], len(order))
+
+    def __len__(self):
+        return len(self.frame)
+
+    def positions(self, session_ids):
+        """Row positions of the sessions in `session_ids` (sorted, unique)."""
+        session_ids = np.asarray(session_ids, dtype=np.int64)
+        if len(session_ids) == len(self.ids) and np.array_equal(session_ids, self.ids):
+            return np.arange(len(self.frame))
+        if len(session_ids) * 8 > len(self.ids):
+            # Large selections: a per-row mask is cheaper than building every range
+            selected = sorted_member(session_ids, self.ids)
+            return np.flatnonzero(np.repeat(selected, self.ends - self.starts))
+        loc = np.searchsorted(self.ids, session_ids)
+        found = loc < len(self.ids)
+        found[found] = self.ids[loc[found]] == session_ids[found]
+        loc = loc[found]
+        return expand_ranges(self.starts[loc], self.ends[loc])
+
+    def take(self, session_ids):
+        positions = self.positions(session_ids)
+        # Every session selected: the sorted frame itself, no row copy
+        return self.frame if len(positions) == len(self.frame) else self.frame.iloc[positions]
+
+    def extend(self, rows):
+        """Index with `rows` appended; only the new rows are sorted when they come after the old ids."""
+        rows = rows[rows[self.key].notna()]
+        keys = rows[self.key].to_numpy(dtype=np.int64)
+        if len(keys) == 0:
+            return self
+        if len(self.ids) and keys.min() < self.ids[-1]:
+            # Late rows for older sessions: fall back to a full rebuild
+            return SessionIndex(concat_rows(self.frame, rows), self.key)
+
+        order = np.argsort(keys, kind="stable")
+        ids, starts = np.unique(keys[order], return_index=True)
+        starts = starts + len(self.frame)
+        if len(self.ids) and ids[0] == self.ids[-1]:
+            # Rows continuing the last session just move its end offset
+            ids, starts = ids[1:], starts[1:]
+
+        index = SessionIndex.__new__(SessionIndex)
+        index.key = self.key
+        index.frame = concat_rows(self.frame, rows.iloc[order])
+        index.ids = np.concatenate([self.ids, ids])
+        index.starts = np.concatenate([self.starts, starts])
+        index.ends = np.append(index.starts[1:], len(index.frame))
+        return index
+
+
+class SessionSets:
+    """Sorted session id arrays per filter value, e.g. sets["device_type"]["mobile"]."""
+
+    def __init__(self, sessions, columns=SET_COLUMNS):
+        sessions = sessions[sessions[KEY].notna()]
+        ids = pd.Series(sessions[KEY].to_numpy(dtype=np.int64), index=sessions.index)
+        self.all_ids = np.unique(ids.to_numpy())
+        self.sets = {}
+        for col in columns:
+            if col not in sessions.columns:
+                continue
+            groups = ids.groupby(sessions[col], observed=True)
+            self.sets[col] = {value: np.unique(group.to_numpy()) for value, group in groups}
+
+    def extend(self, sessions):
+        added = SessionSets(sessions, list(self.sets))
+        merged = SessionSets.__new__(SessionSets)
+        merged.all_ids = np.union1d(self.all_ids, added.all_ids)
+        merged.sets = {col: dict(values) for col, values in self.sets.items()}
+        for col, values in added.sets.items():
+            for value, ids in values.items():
+                old = merged.sets[col].get(value)
+                merged.sets[col][value] = ids if old is None else np.union1d(old, ids)
+        return merged
+
+    def ids_for(self, **selection):
+        # OR within a column, AND across columns; empty selections are ignored
+        result = self.all_ids
+        for col, values in selection.items():
+            if not values:
+                continue
+            chosen = [self.sets[col].get(v, np.empty(0, dtype=np.int64)) for v in values]
+            result = np.intersect1d(result, np.unique(np.concatenate(chosen)), assume_unique=True)
+        return result
+
+
+def sorted_member(sorted_ids, values):
+    """Boolean mask of `values` found in the sorted array `sorted_ids`."""
+    values = np.asarray(values)
+    if len(sorted_ids) == 0:
+        return np.zeros(len(values), dtype=bool)
+    loc = np.minimum(np.searchsorted(sorted_ids, values), len(sorted_ids) - 1)
+    return sorted_ids[loc] == values
+
+
+def unique_sorted(values):
+    """Sorted distinct `values`; np.unique without return_index hashes, which is far slower on ids."""
+    values = np.sort(np.asarray(values))
+    return values[np.concatenate(([True], values[1:] != values[:-1]))] if len(values) else values
+
+
+def expand_ranges(starts, ends):
+    # Concatenate arange(start, end) for every pair without a Python loop
+    lengths = ends - starts
+    if lengths.sum() == 0:
+        return np.empty(0, dtype=np.int64)
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return offsets + np.arange(lengths.sum())
+
+
+def _update_index(table):
+    def update(index, dataset, name, rows):
+        return index.extend(rows) if name == table else index
+    return update
+
+
+def _update_sets(sets, dataset, name, rows):
+    return sets.extend(rows) if name == "sessions" else sets
+
+
+register_incremental("session_index", _update_index("sessions"))
+register_incremental("pageview_index", _update_index("pageviews"))
+register_incremental("order_index", _update_index("orders"))
+register_incremental("session_sets", _update_sets)
+
+
+@requires(sessions=[KEY])
+def session_index(dataset):
+    return dataset.derived("session_index", lambda ds: SessionIndex(ds.table("sessions")))
+
+
+@requires(pageviews=[KEY])
+def pageview_index(dataset):
+    return dataset.derived("pageview_index", lambda ds: SessionIndex(ds.table("pageviews")))
+
+
+@requires(orders=[KEY])
+def order_index(dataset):
+    return dataset.derived("order_index", lambda ds: SessionIndex(ds.table("orders")))
+
+
+@requires(sessions=[KEY] + SET_COLUMNS)
+def session_sets(dataset):
+    return dataset.derived("session_sets", lambda ds: SessionSets(ds.table("sessions")))
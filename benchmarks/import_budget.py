@@ -0,0 +1,98 @@
+"""Import-time budget of the app's startup path.
+
+    python -m benchmarks.import_budget
+    python -m benchmarks.import_budget --repeat 5 --slack 1.5
+
+Each module of BUDGETS_MS is imported `--repeat` times in a fresh interpreter
+under `-X importtime`. The median cumulative time is checked against its
+budget (times `--slack` on slower hosts). The heaviest imports it pulls in are
+listed too. Modules in DEFERRED must not be loaded by that import at all.
+Exits 1 on any breach, so CI can run it as a check.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Module -> median cumulative import time allowed, in ms
+BUDGETS_MS = {
+    # What runs before the login screen shows: Streamlit and the login form
+    "main_app": 1500,
+    # Every renderer with pandas, plotly and the data layer, loaded after login
+    "dashboards": 2500,
+    "marketing_manager.visuals": 2500,
+    # The headless compute layer
+    "metrics.marketing": 1200,
+}
+
+# Module -> libraries its import must leave unloaded
+DEFERRED = {
+    "main_app": ["pandas", "pyarrow", "matplotlib", "seaborn", "sklearn"],
+    "dashboards": ["matplotlib", "seaborn", "sklearn"],
+    "marketing_manager.visuals": ["matplotlib", "seaborn", "sklearn"],
+    "metrics.marketing": ["streamlit", "plotly", "matplotlib", "seaborn", "sklearn"],
+}
+
+
+def measure(module):
+    """(cumulative ms, {direct import: cumulative ms}, deferred libraries that got loaded) of one fresh import."""
+    code = (f"import sys, json; import {module}; "
+            f"print(json.dumps([m for m in {DEFERRED.get(module, [])!r} if m in sys.modules]))")
+    env = dict(os.environ, DASHBOARD_PROFILE="0", DASHBOARD_PROFILE_LOG="")
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, env=env,
+                          capture_output=True, text=True, check=True)
+    total, children, pending = None, {}, {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            pending[name.strip()] = int(cumulative) / 1000
+        elif depth == 0:
+            # -X importtime prints the children of an import before the import itself
+            if name.strip() == module:
+                total, children = int(cumulative) / 1000, pending
+            pending = {}
+    loaded = json.loads(proc.stdout.strip().splitlines()[-1])
+    return total, children, loaded
+
+
+def check(repeat, slack, top):
+    failures = []
+    for module, budget in BUDGETS_MS.items():
+        runs = [measure(module) for _ in range(repeat)]
+        median = statistics.median(run[0] for run in runs)
+        allowed = budget * slack
+        loaded = sorted({lib for run in runs for lib in run[2]})
+        status = "ok" if median <= allowed and not loaded else "OVER"
+        print(f"{module:<30}{median:>10.0f} ms  budget {allowed:>6.0f} ms  {status}")
+        # Heaviest direct imports of the last run, where to look when the budget breaks
+        for name, ms in sorted(runs[-1][1].items(), key=lambda item: -item[1])[:top]:
+            print(f"    {name:<40}{ms:>8.0f} ms")
+        if median > allowed:
+            failures.append(f"{module} imports in {median:.0f} ms, budget {allowed:.0f} ms")
+        if loaded:
+            failures.append(f"{module} loads {', '.join(loaded)} at import")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--slack", type=float, default=1.0, help="multiplier on every budget")
+    parser.add_argument("--top", type=int, default=5, help="heaviest direct imports listed per module")
+    args = parser.parse_args()
+
+    failures = check(args.repeat, args.slack, args.top)
+    for failure in failures:
+        print("FAIL: " + failure)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
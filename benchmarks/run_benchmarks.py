@@ -0,0 +1,229 @@
+"""Headless benchmarks of the dashboard hot paths on synthetic data.
+
+    python -m benchmarks.run_benchmarks --scale 1 --scale 10 --out bench.csv
+    python -m benchmarks.run_benchmarks --scale 1 --baseline bench.csv
+
+Every scale runs in its own process (the loader reads DASHBOARD_DATA_DIR at
+import) against benchmarks/.data/scale-<scale>-seed-<seed>, generated on first
+use. Each case gets a warm-up call, then `--repeat` timed calls and one more
+under tracemalloc for the peak allocation; a case that raises is reported
+with its error instead. With --baseline, cases slower than `--tolerance` times
+their baseline median are reported and the exit code is 1.
+"""
+import argparse
+import inspect
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_ROOT = os.path.join(ROOT, "benchmarks", ".data")
+RESULT_COLUMNS = ["scale", "case", "rows_in", "median_ms", "min_ms", "peak_mb", "error"]
+
+
+def _cases():
+    """(name, callable, args) for every benchmarked function, on the data of this process."""
+    import dashboards  # noqa: F401  registers every renderer's column declarations
+    import memo
+    from analytics.attribution import ATTRIBUTION_MODELS, attribute, touchpoints
+    from analytics.path_trie import PathTrie
+    from analytics.paths import build_session_paths
+    from analytics.session_features import join_features, session_features
+    from ceo.filter import apply_filter, apply_filters
+    from data_loader import get_dataset, session_paths, session_paths_for
+    from marketing_manager import visuals
+    from metrics import marketing
+    from metrics.kpis import compute_kpis
+    from metrics.website import session_orders, session_pageviews
+
+    dataset = get_dataset()
+    orders, sessions, pageviews = (dataset.table(name) for name in ("orders", "sessions", "pageviews"))
+    mobile_sessions = sessions[sessions["device_type"] == "mobile"]
+    filters = apply_filter(orders, dataset)
+    order_data = filters["order_data"]
+    website_sessions = join_features(filters["sessions"], session_features(dataset))
+    paths = session_paths(dataset)
+    points = touchpoints(dataset)
+    comparison = pd.concat([attribute(order_data, points, model).assign(model=label)
+                            for model, label in ATTRIBUTION_MODELS.items()], ignore_index=True)
+    matrix = marketing.channel_kpi_matrix(order_data, website_sessions)
+    trie = PathTrie.build(paths, order_data["website_session_id"].dropna())
+    # Arguments of the metrics functions and visuals builders, by parameter name
+    inputs = {
+        "order_data": order_data,
+        "website_sessions": website_sessions,
+        "combined": paths,
+        "session_path_data": paths,
+        "column": "utm_campaign",
+        "matrix": matrix,
+        "frame": matrix.set_index("utm_source")[marketing.CHANNEL_KPIS],
+        "next_steps": trie.children(trie.find([])),
+        "after": "",
+        "attributed": attribute(order_data, points, "last_touch"),
+        "comparison": comparison,
+        "channel": "utm_source",
+        "model_label": ATTRIBUTION_MODELS["last_touch"],
+    }
+
+    # The Marketing tab's path slice: sidebar default range, then one source and device
+    date_range = (orders["order_date"].min().to_pydatetime(), orders["order_date"].max().to_pydatetime())
+    selection = (("utm_source", ("gsearch",)), ("device_type", ("mobile",)))
+
+    def uncached_path_slice(date_range, selection):
+        session_paths_for.clear()
+        return session_paths_for(dataset.version, date_range, selection)
+
+    cases = [
+        ("compute_kpis", compute_kpis, (order_data, website_sessions)),
+        ("apply_filter", apply_filter, (orders, dataset)),
+        # The Website Manager slices of one sidebar filter
+        ("session_pageviews", session_pageviews, (dataset, mobile_sessions)),
+        ("session_orders", session_orders, (dataset, mobile_sessions)),
+        ("apply_filters", apply_filters, (orders, {"utm_source": ["gsearch"], "device_type": ["mobile"]})),
+        # Full-history path table, built once per dataset by the warm-up
+        ("build_session_paths", build_session_paths, (pageviews,)),
+        ("session_paths_for", uncached_path_slice, (date_range, ())),
+        ("session_paths_for[selection]", uncached_path_slice, (date_range, selection)),
+    ]
+    # The compute layer on its own, then the figures built over it
+    for prefix, module in (("metrics", marketing), ("visuals", visuals)):
+        for name, fn in inspect.getmembers(module, inspect.isfunction):
+            if fn.__module__ != module.__name__:
+                continue
+            params = [p for p in inspect.signature(fn).parameters.values() if p.default is inspect.Parameter.empty]
+            missing = [p.name for p in params if p.name not in inputs]
+            if missing:
+                raise KeyError(f"no benchmark input for {name}({', '.join(missing)})")
+            cases.append((f"{prefix}.{name}", fn, tuple(inputs[p.name] for p in params)))
+    # Charts share aggregations within a rerun; every call here must start cold
+    return [(name, _fresh_rerun(memo, fn), args) for name, fn, args in cases]
+
+
+def _fresh_rerun(memo, fn):
+    def call(*args):
+        memo.begin_rerun()
+        return fn(*args)
+    return call
+
+
+def _close_figures():
+    # Only the legacy heatmap loads matplotlib, there is nothing to close before it ran
+    plt = sys.modules.get("matplotlib.pyplot")
+    if plt is not None:
+        plt.close("all")
+
+
+def run_cases(scale, repeat):
+    from profiler import rows
+
+    results = []
+    for name, fn, args in _cases():
+        try:
+            fn(*args)
+        except Exception as e:
+            # Recorded rather than fatal, so one broken builder does not hide the others
+            results.append({"scale": scale, "case": name, "rows_in": rows(list(args)), "error": repr(e)})
+            print(f"  {name:<55}{'failed':>15}", file=sys.stderr)
+            continue
+        finally:
+            _close_figures()
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn(*args)
+            times.append((time.perf_counter() - start) * 1000)
+            _close_figures()
+        tracemalloc.start()
+        fn(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        _close_figures()
+        results.append({"scale": scale, "case": name, "rows_in": rows(list(args)),
+                        "median_ms": round(statistics.median(times), 3), "min_ms": round(min(times), 3),
+                        "peak_mb": round(peak / 2**20, 2), "error": None})
+        print(f"  {name:<55}{results[-1]['median_ms']:>12.1f} ms", file=sys.stderr)
+    return results
+
+
+def data_dir(scale, seed):
+    from benchmarks.synthetic_data import write_dataset
+
+    path = os.path.join(DATA_ROOT, f"scale-{scale:g}-seed-{seed}")
+    if not os.path.exists(os.path.join(path, "websitesession360.csv")):
+        print(f"generating {scale:g}x data in {path}", file=sys.stderr)
+        write_dataset(path, scale, seed)
+    return path
+
+
+def run_scale(scale, seed, repeat):
+    """Benchmarks of one scale in a child process, so the loader sees that scale's data directory."""
+    env = dict(os.environ, DASHBOARD_DATA_DIR=data_dir(scale, seed), MPLBACKEND="Agg",
+               DASHBOARD_PROFILE="0", DASHBOARD_PROFILE_LOG="")
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+        out = f.name
+    try:
+        subprocess.run([sys.executable, "-m", "benchmarks.run_benchmarks", "--child", str(scale),
+                        "--repeat", str(repeat), "--out", out], cwd=ROOT, env=env, check=True)
+        with open(out) as f:
+            return json.load(f)
+    finally:
+        os.remove(out)
+
+
+def compare(results, baseline, tolerance):
+    """Results joined with the baseline medians; `regressed` marks cases over the tolerance."""
+    merged = results.merge(baseline[["scale", "case", "median_ms"]], on=["scale", "case"], how="left",
+                           suffixes=("", "_baseline"))
+    merged["ratio"] = (merged["median_ms"] / merged["median_ms_baseline"]).round(2)
+    merged["regressed"] = merged["ratio"] > tolerance
+    return merged
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=float, action="append", help="multiple of the original export (repeatable)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", help="write the results to this .csv or .json file")
+    parser.add_argument("--baseline", help="earlier --out file to compare against")
+    parser.add_argument("--tolerance", type=float, default=1.25, help="slowdown ratio counted as a regression")
+    parser.add_argument("--child", type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        # Widgets and caches run in bare mode here; their "no runtime" warnings are expected
+        logging.disable(logging.WARNING)
+        with open(args.out, "w") as f:
+            json.dump(run_cases(args.child, args.repeat), f)
+        return 0
+
+    sys.path.insert(0, ROOT)
+    results = pd.DataFrame([row for scale in args.scale or [1.0] for row in run_scale(scale, args.seed, args.repeat)],
+                           columns=RESULT_COLUMNS)
+    if args.out:
+        if args.out.endswith(".json"):
+            results.to_json(args.out, orient="records", indent=1)
+        else:
+            results.to_csv(args.out, index=False)
+
+    failed = False
+    if args.baseline:
+        baseline = pd.read_json(args.baseline) if args.baseline.endswith(".json") else pd.read_csv(args.baseline)
+        results = compare(results, baseline, args.tolerance)
+        failed = bool(results["regressed"].any())
+    print(results.sort_values(["scale", "median_ms"], ascending=[True, False]).to_string(index=False))
+    if failed:
+        print(f"\nregressions over {args.tolerance}x: " + ", ".join(results.loc[results["regressed"], "case"]))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
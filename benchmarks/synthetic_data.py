@@ -0,0 +1,269 @@
+"""Seeded synthetic copies of the Data/ CSVs at a multiple of the original export's size.
+
+    python -m benchmarks.synthetic_data OUT_DIR --scale 10 --seed 0
+
+Scale multiplies the sessions (1x is about 473k sessions and 1.15M pageviews);
+pageviews, orders, items and refunds follow from the simulated funnel, so
+every table keeps the shape the loader and the dashboards expect (same
+columns, day-first timestamps, empty cells for untagged traffic).
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from schema import DATE_FORMAT
+
+# Sessions in the original export; 1x reproduces its size
+BASE_SESSIONS = 472_871
+START = pd.Timestamp("2012-03-19 08:00")
+END = pd.Timestamp("2015-03-19 08:00")
+
+PRODUCTS = pd.DataFrame({
+    "product_id": [1, 2, 3, 4],
+    "created_at": pd.to_datetime(["2012-03-19 08:00", "2013-01-06 13:00", "2013-12-12 09:00", "2014-02-05 10:00"]),
+    "product_name": ["The Original Mr. Fuzzy", "The Forever Love Bear", "The Birthday Sugar Panda",
+                     "The Hudson River Mini bear"],
+    "price_usd": [49.99, 59.99, 45.99, 29.99],
+    "cogs_usd": [19.49, 22.49, 14.49, 9.49],
+})
+# Only the first three have a product page; the mini bear is sold as a cross-sell
+PRODUCT_PAGES = ["/the-original-mr-fuzzy", "/the-forever-love-bear", "/the-birthday-sugar-panda"]
+
+# (utm_source, utm_campaign, utm_content, http_referer, share of sessions); None is an empty cell
+CHANNELS = [
+    ("gsearch", "nonbrand", "g_ad_1", "https://www.gsearch.com", 0.60),
+    ("gsearch", "nonbrand", "g_ad_2", "https://www.gsearch.com", 0.05),
+    ("gsearch", "brand", "g_ad_2", "https://www.gsearch.com", 0.04),
+    ("bsearch", "nonbrand", "b_ad_1", "https://www.bsearch.com", 0.11),
+    ("bsearch", "brand", "b_ad_2", "https://www.bsearch.com", 0.01),
+    ("socialbook", "pilot", "social_ad_1", "https://www.socialbook.com", 0.01),
+    ("socialbook", "desktop_targeted", "social_ad_2", "https://www.socialbook.com", 0.02),
+    (None, None, None, "https://www.gsearch.com", 0.09),
+    (None, None, None, "https://www.bsearch.com", 0.02),
+    (None, None, None, None, 0.05),
+]
+LANDING_PAGES = ["/home", "/lander-1", "/lander-2", "/lander-3", "/lander-4", "/lander-5"]
+# Chance of going one page further at each step: landing -> /products -> product -> /cart
+# -> /shipping -> billing -> /thank-you-for-your-order
+FUNNEL_CONTINUE = [0.55, 0.75, 0.45, 0.68, 0.80, 0.62]
+FUNNEL_STAGES = {1: "Landing Bounce", 2: "Dropped at Product", 3: "Dropped at Product", 4: "Dropped at Cart",
+                 5: "Dropped at Checkout", 6: "Dropped at Checkout", 7: "Converted Session"}
+REPEAT_SHARE = 0.15
+MOBILE_SHARE = 0.25
+CROSS_SELL_RATE = 0.24
+CROSS_SELL_FROM = pd.Timestamp("2013-09-25")
+BILLING_2_FROM = pd.Timestamp("2012-09-10")
+REFUND_RATE = 0.043
+# Sessions simulated and written per pass
+CHUNK_SESSIONS = 1_000_000
+
+
+def _channel_field(channel, i):
+    # Categorical straight from the channel codes; large scales never hold one string per row
+    labels = [c[i] for c in CHANNELS]
+    categories = list(dict.fromkeys(label for label in labels if label is not None))
+    lookup = np.array([categories.index(label) if label is not None else -1 for label in labels])
+    return pd.Categorical.from_codes(lookup[channel], categories)
+
+
+def _sessions(rng, first, n, total, users_so_far):
+    # Sessions first+1 .. first+n of `total`. Traffic grows over time: the square root of a
+    # uniform puts more sessions towards the end, and each chunk takes its slice of that range
+    u = (first + np.sort(rng.random(n)) * n) / total
+    created = START + pd.to_timedelta((np.sqrt(u) * (END - START).total_seconds()).astype(np.int64), unit="s")
+
+    repeat = rng.random(n) < REPEAT_SHARE
+    if first == 0:
+        repeat[0] = False
+    users = users_so_far + np.cumsum(~repeat)
+    # A repeat session belongs to a user seen before it
+    user_id = np.where(repeat, (rng.random(n) * users).astype(np.int64) + 1, users)
+
+    channel = rng.choice(len(CHANNELS), n, p=[c[4] for c in CHANNELS])
+    depth = 1 + np.cumprod(rng.random((n, len(FUNNEL_CONTINUE))) < FUNNEL_CONTINUE, axis=1).sum(axis=1)
+    mobile = (rng.random(n) < MOBILE_SHARE) & (_channel_field(channel, 1) != "desktop_targeted")
+
+    return pd.DataFrame({
+        "website_session_id": np.arange(first + 1, first + n + 1),
+        "session_created_at": created,
+        "user_id": user_id,
+        "is_repeat_session": repeat.astype(int),
+        "utm_source": _channel_field(channel, 0),
+        "utm_campaign": _channel_field(channel, 1),
+        "utm_content": _channel_field(channel, 2),
+        "device_type": pd.Categorical.from_codes(mobile.astype(np.int8), ["desktop", "mobile"]),
+        "http_referer": _channel_field(channel, 3),
+        "total_pageviews": depth,
+    })
+
+
+def _pageviews(rng, sessions, first_id):
+    n = len(sessions)
+    depth = sessions["total_pageviews"].to_numpy()
+    created = sessions["session_created_at"].to_numpy()
+    launched = (created[:, None] >= PRODUCTS["created_at"].to_numpy()[:3]).sum(axis=1)
+    product = (rng.random(n) * launched).astype(np.int64)
+    landing = rng.integers(0, len(LANDING_PAGES), n)
+    billing_2 = created >= BILLING_2_FROM.to_datetime64()
+
+    session = np.repeat(np.arange(n), depth)
+    step = np.arange(len(session)) - np.repeat(np.cumsum(depth) - depth, depth)
+    pages = np.array(LANDING_PAGES + ["/products"] + PRODUCT_PAGES + ["/cart", "/shipping", "/billing",
+                                                                   "/billing-2", "/thank-you-for-your-order"])
+    base = len(LANDING_PAGES)
+    page = np.select(
+        [step == 0, step == 1, step == 2, step == 3, step == 4, step == 5],
+        [landing[session], base, base + 1 + product[session], base + 4, base + 5,
+         np.where(billing_2[session], base + 7, base + 6)],
+        base + 8,
+    )
+    # 10 s to 5 min between pages, timestamps kept at the export's minute precision
+    gaps = np.where(step == 0, 0, rng.integers(10, 300, len(session)))
+    elapsed = np.cumsum(gaps)
+    offset = elapsed - np.repeat(elapsed[np.cumsum(depth) - depth], depth)
+    times = (created[session] + offset.astype("timedelta64[s]")).astype("datetime64[m]")
+
+    pageviews = pd.DataFrame({
+        "website_pageview_id": np.arange(first_id + 1, first_id + len(session) + 1),
+        "created_at": times,
+        "website_session_id": sessions["website_session_id"].to_numpy()[session],
+        "pageview_url": pd.Categorical.from_codes(page, pages),
+    })
+    return pageviews, product
+
+
+def _orders(rng, sessions, pageviews, product, ids):
+    converted = sessions["total_pageviews"].to_numpy() == len(FUNNEL_CONTINUE) + 1
+    last_view = pageviews.groupby("website_session_id")["created_at"].max().to_numpy()
+    orders = sessions[converted].assign(order_date=last_view[converted], primary_product_id=product[converted] + 1)
+    orders = orders.sort_values("order_date", kind="stable", ignore_index=True)
+    orders.insert(0, "order_id", np.arange(ids["order"] + 1, ids["order"] + len(orders) + 1))
+    k = len(orders)
+
+    # Cross-sells add one other launched product, primary item first in every order
+    primary = orders["primary_product_id"].to_numpy()
+    launched = (orders["order_date"].to_numpy()[:, None] >= PRODUCTS["created_at"].to_numpy()).sum(axis=1)
+    cross = (orders["order_date"].to_numpy() >= CROSS_SELL_FROM.to_datetime64()) & (rng.random(k) < CROSS_SELL_RATE)
+    other = (primary + (rng.random(k) * (launched - 1)).astype(np.int64)) % launched + 1
+    items = pd.DataFrame({
+        "order_id": np.concatenate([orders["order_id"], orders["order_id"][cross]]),
+        "created_at": np.concatenate([orders["order_date"], orders["order_date"][cross]]),
+        "product_id": np.concatenate([primary, other[cross]]),
+        "is_primary_item": np.concatenate([np.ones(k, dtype=int), np.zeros(cross.sum(), dtype=int)]),
+    }).sort_values(["order_id", "is_primary_item"], ascending=[True, False], ignore_index=True)
+    items.insert(0, "order_item_id", np.arange(ids["item"] + 1, ids["item"] + len(items) + 1))
+    prices = PRODUCTS.set_index("product_id")
+    items["price_usd"] = prices["price_usd"].reindex(items["product_id"]).to_numpy()
+    items["cogs_usd"] = prices["cogs_usd"].reindex(items["product_id"]).to_numpy()
+    items = items[["order_item_id", "created_at", "order_id", "product_id", "is_primary_item", "price_usd", "cogs_usd"]]
+
+    refunded = items[rng.random(len(items)) < REFUND_RATE]
+    refunds = pd.DataFrame({
+        "created_at": refunded["created_at"] + pd.to_timedelta(rng.integers(1, 30 * 24 * 60, len(refunded)), unit="m"),
+        "order_item_id": refunded["order_item_id"],
+        "order_id": refunded["order_id"],
+        "refund_amount_usd": refunded["price_usd"],
+    }).sort_values("created_at", kind="stable", ignore_index=True)
+    refunds.insert(0, "order_item_refund_id", np.arange(ids["refund"] + 1, ids["refund"] + len(refunds) + 1))
+
+    totals = items.groupby("order_id")[["price_usd", "cogs_usd"]].sum()
+    orders["items_purchased"] = items.groupby("order_id").size().to_numpy()
+    orders["price_usd"] = totals["price_usd"].to_numpy()
+    orders["cogs_usd"] = totals["cogs_usd"].to_numpy()
+    # Empty for orders without a refund, like the export
+    orders["refund_amount_usd"] = refunds.groupby("order_id")["refund_amount_usd"].sum().reindex(orders["order_id"]).to_numpy()
+    orders["product_name"] = PRODUCTS.set_index("product_id")["product_name"].reindex(primary).to_numpy()
+    orders = orders[["order_id", "order_date", "website_session_id", "user_id", "primary_product_id", "items_purchased",
+                     "price_usd", "cogs_usd", "refund_amount_usd", "utm_source", "utm_campaign", "utm_content",
+                     "device_type", "is_repeat_session", "http_referer", "product_name"]]
+    return orders, items, refunds
+
+
+def _chunk(rng, first, n, total, ids):
+    """Every table's rows for sessions first+1 .. first+n; advances the running ids in `ids`."""
+    sessions = _sessions(rng, first, n, total, ids["user"])
+    pageviews, product = _pageviews(rng, sessions, ids["pageview"])
+    orders, items, refunds = _orders(rng, sessions, pageviews, product, ids)
+
+    span = pageviews.groupby("website_session_id")["created_at"].agg(["min", "max"])
+    depth = sessions["total_pageviews"]
+    sessions["session_duration_MIN"] = ((span["max"] - span["min"]).dt.total_seconds() / 60).to_numpy()
+    sessions["is_bounce"] = (depth == 1).astype(int)
+    sessions["orders_in_session"] = (depth == len(FUNNEL_CONTINUE) + 1).astype(int)
+    sessions["funnel_stage"] = depth.map(FUNNEL_STAGES)
+
+    ids["user"] = int(sessions["user_id"].max())
+    ids["pageview"] += len(pageviews)
+    ids["order"] += len(orders)
+    ids["item"] += len(items)
+    ids["refund"] += len(refunds)
+    return {
+        "websitesession360.csv": sessions,
+        "website_pageviews.csv": pageviews,
+        "orders360.csv": orders,
+        "order_items.csv": items,
+        "order_item_refunds.csv": refunds,
+    }
+
+
+def _customers(first_sessions, orders):
+    # A user's first session is the non-repeat session that introduced them, in user_id order
+    first = pd.concat(first_sessions, ignore_index=True)
+    orders = pd.concat(orders, ignore_index=True)
+    placed = orders.groupby("user_id")["order_date"]
+    users = first["user_id"]
+    return pd.DataFrame({
+        "user_id": users,
+        "first_session_date": first["session_created_at"],
+        "first_utm_source": first["utm_source"],
+        "first_device_type": first["device_type"],
+        "total_orders": placed.size().reindex(users, fill_value=0).to_numpy(),
+        "first_order_date": placed.min().reindex(users).to_numpy(),
+        "last_order_date": placed.max().reindex(users).to_numpy(),
+    })
+
+
+def write_dataset(out_dir, scale=1.0, seed=0, chunk_sessions=CHUNK_SESSIONS):
+    """Write every CSV the loader reads to `out_dir`, returns rows per file.
+
+    Sessions are simulated `chunk_sessions` at a time and appended to the files,
+    so memory stays flat apart from the per-user first sessions kept for
+    customers360. The output depends on the seed and the chunk size.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    total = max(int(round(BASE_SESSIONS * scale)), 1)
+    ids = dict.fromkeys(["user", "pageview", "order", "item", "refund"], 0)
+    counts = {}
+    first_sessions, placed = [], []
+
+    def append(filename, df):
+        path = os.path.join(out_dir, filename)
+        df.to_csv(path, mode="a" if filename in counts else "w", header=filename not in counts, index=False,
+                  date_format=DATE_FORMAT)
+        counts[filename] = counts.get(filename, 0) + len(df)
+
+    for first in range(0, total, chunk_sessions):
+        for filename, df in _chunk(rng, first, min(chunk_sessions, total - first), total, ids).items():
+            append(filename, df)
+            if filename == "websitesession360.csv":
+                first_sessions.append(df.loc[df["is_repeat_session"] == 0,
+                                             ["user_id", "session_created_at", "utm_source", "device_type"]])
+            elif filename == "orders360.csv":
+                placed.append(df[["user_id", "order_date"]])
+    append("products.csv", PRODUCTS[["product_id", "created_at", "product_name"]])
+    append("customers360.csv", _customers(first_sessions, placed))
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("out_dir")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiple of the original export's sessions")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-sessions", type=int, default=CHUNK_SESSIONS)
+    args = parser.parse_args()
+    for filename, rows in write_dataset(args.out_dir, args.scale, args.seed, args.chunk_sessions).items():
+        print(f"{filename:<26}{rows:>12,}")
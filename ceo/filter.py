@@ -1,39 +1,44 @@
 import streamlit as st
 import pandas as pd
+from analytics.session_features import sessions_between
+from analytics.session_index import KEY, session_index
+from dataset import requires
+from profiler import profiled
 
 # filter for CEO
-def apply_filters(filtered_df):
+@profiled
+def select_filters(filtered_df):
     st.sidebar.header("📂 Filter Data")
 
-    utm_filter = st.sidebar.multiselect("UTM Source", filtered_df["utm_source"].dropna().unique())
-    device_filter = st.sidebar.multiselect("Device Type", filtered_df["device_type"].dropna().unique())
-    product_filter = st.sidebar.multiselect("Product Name", filtered_df["product_name"].dropna().unique())
-    campaign_filter = st.sidebar.multiselect("UTM Campaign", filtered_df["utm_campaign"].dropna().unique())
-
-    filtered_df=filtered_df.copy()
-
-    if utm_filter:
-        filtered_df = filtered_df[filtered_df["utm_source"].isin(utm_filter)]
-    if device_filter:
-        filtered_df = filtered_df[filtered_df["device_type"].isin(device_filter)]
-    if product_filter:
-        filtered_df = filtered_df[filtered_df["product_name"].isin(product_filter)]
-    if campaign_filter:
-        filtered_df = filtered_df[filtered_df["utm_campaign"].isin(campaign_filter)]
+    # Keys match the order cube dimensions so the selection can slice it directly
+    return {
+        "utm_source": st.sidebar.multiselect("UTM Source", filtered_df["utm_source"].dropna().unique()),
+        "device_type": st.sidebar.multiselect("Device Type", filtered_df["device_type"].dropna().unique()),
+        "product_name": st.sidebar.multiselect("Product Name", filtered_df["product_name"].dropna().unique()),
+        "utm_campaign": st.sidebar.multiselect("UTM Campaign", filtered_df["utm_campaign"].dropna().unique()),
+    }
+
+
+def apply_filters(filtered_df, selection=None):
+    if selection is None:
+        selection = select_filters(filtered_df)
+
+    for column, values in selection.items():
+        if values:
+            filtered_df = filtered_df[filtered_df[column].isin(values)]
     return filtered_df
 
 
 ##################
 
 #filter for marketing
-def apply_filter(order_data, website_pageviews, website_sessions):
+@profiled
+# Session columns the Marketing tab reads off the returned rows
+@requires(sessions=[KEY, "user_id", "is_repeat_session", "utm_source", "utm_campaign", "utm_content",
+                    "device_type"])
+def apply_filter(order_data, dataset):
     st.sidebar.title("🔍 Filters")
 
-    # --- Date conversion ---
-    order_data['order_date'] = pd.to_datetime(order_data['order_date'])
-    website_pageviews['created_at'] = pd.to_datetime(website_pageviews['created_at'])
-    website_sessions['session_created_at'] = pd.to_datetime(website_sessions['session_created_at'])
-
     # --- Setup default values ---
     product_list = sorted(order_data['product_name'].dropna().unique())
     utm_sources = sorted(order_data['utm_source'].dropna().unique())
@@ -95,19 +100,12 @@ def apply_filter(order_data, website_pageviews, website_sessions):
 
     filtered_order_data = order_data[product_mask & source_mask & device_mask & date_mask]
 
-    # Filter pageviews and sessions
-    filtered_pageviews = website_pageviews[
-        (website_pageviews['created_at'] >= selected_date_range[0]) &
-        (website_pageviews['created_at'] <= selected_date_range[1])
-    ]
-    filtered_session_ids = filtered_pageviews['website_session_id'].unique()
-    filtered_sessions = website_sessions[
-        website_sessions['website_session_id'].isin(filtered_session_ids)
-    ]
+    # Sessions with a pageview in the date range, sliced from the session-sorted index
+    session_ids = sessions_between(dataset, *selected_date_range)
+    filtered_sessions = session_index(dataset).take(session_ids)
 
     return {
         "order_data": filtered_order_data,
-        "pageviews": filtered_pageviews,
         "sessions": filtered_sessions,
         "selected_products": selected_products,
         "selected_sources": selected_sources,
@@ -0,0 +1,76 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+import streamlit as st
+
+import memo
+
+# Threads computing the chart aggregations of a rerun; 0 or 1 computes them inline
+# as they are submitted. pandas/numpy release the GIL in their inner loops
+CHART_WORKERS = int(os.environ.get("DASHBOARD_CHART_WORKERS", min(4, os.cpu_count() or 1)))
+# Processes for the tasks submitted with process=True, 0 keeps those on the threads too.
+# Their arguments and results are pickled, so only groupbys that cost more than
+# shipping the frames gain from them
+CHART_PROCESSES = int(os.environ.get("DASHBOARD_CHART_PROCESSES", "0"))
+# DASHBOARD_ACTIVE_TAB_ONLY=1: switching tabs reruns the page and only the open tab is computed
+ACTIVE_TAB_ONLY = os.environ.get("DASHBOARD_ACTIVE_TAB_ONLY", "0") == "1"
+
+_lock = threading.Lock()
+_pools = {}
+
+
+def _pool(kind):
+    # One pool of each kind per server process, shared by every session
+    with _lock:
+        if kind not in _pools:
+            if kind == "process":
+                # spawn: forking a server full of threads can copy held locks into the child
+                _pools[kind] = ProcessPoolExecutor(CHART_PROCESSES, mp_context=multiprocessing.get_context("spawn"))
+            else:
+                _pools[kind] = ThreadPoolExecutor(CHART_WORKERS, thread_name_prefix="chart")
+        return _pools[kind]
+
+
+def submit(fn, *args, process=False, **kwargs):
+    """Start `fn(*args, **kwargs)` for this rerun and return its Future.
+
+    Submit every independent aggregation of the page first, then call
+    `.result()` where each chart is drawn; errors are raised there. `fn` must
+    not call Streamlit: workers have no script context. Thread tasks share the
+    rerun's memo (memo.grouped); process tasks get one of their own, and `fn`
+    and its arguments must be picklable.
+    """
+    if process and CHART_PROCESSES > 0:
+        return _pool("process").submit(memo.isolated, fn, *args, **kwargs)
+    if CHART_WORKERS > 1:
+        rerun_memo = memo.current()
+
+        def task():
+            with memo.bound(rerun_memo):
+                return fn(*args, **kwargs)
+        return _pool("thread").submit(task)
+    future = Future()
+    try:
+        future.set_result(fn(*args, **kwargs))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def tabs(labels, key):
+    """`st.tabs`; with ACTIVE_TAB_ONLY, switching tabs reruns the page and `is_open` tells the open one."""
+    if ACTIVE_TAB_ONLY:
+        return st.tabs(labels, key=key, on_change="rerun")
+    return st.tabs(labels)
+
+
+def is_open(tab):
+    # `open` is None when the tabs do not track which one is open: then all of them run
+    return getattr(tab, "open", None) is not False
+
+
+def submit_for(tab, fn, *args, **kwargs):
+    """`submit` when `tab` is going to be drawn, else None."""
+    return submit(fn, *args, **kwargs) if is_open(tab) else None
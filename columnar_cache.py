@@ -0,0 +1,193 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from schema import SCHEMA_VERSION, apply_schema
+
+# pyarrow is optional: without it the loader keeps parsing the CSVs
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+except ImportError:
+    pa = None
+
+CACHE_DIRNAME = ".cache"
+
+
+def cache_available():
+    return pa is not None
+
+
+def _cache_paths(data_dir, filename):
+    stem = os.path.splitext(filename)[0]
+    cache_dir = os.path.join(data_dir, CACHE_DIRNAME)
+    return os.path.join(cache_dir, stem + ".arrow"), os.path.join(cache_dir, stem + ".json")
+
+
+def _file_hash(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _source_stamp(path):
+    stat = os.stat(path)
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def _read_manifest(manifest_path):
+    try:
+        with open(manifest_path) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_manifest(manifest_path, manifest):
+    with open(manifest_path, "w") as fh:
+        json.dump(manifest, fh, indent=2)
+
+
+def is_fresh(data_dir, filename):
+    source = os.path.join(data_dir, filename)
+    arrow_path, manifest_path = _cache_paths(data_dir, filename)
+    manifest = _read_manifest(manifest_path)
+    if manifest is None or not os.path.exists(arrow_path):
+        return False
+    if manifest.get("schema_version") != SCHEMA_VERSION:
+        return False
+
+    stamp = _source_stamp(source)
+    if stamp["mtime_ns"] == manifest["mtime_ns"] and stamp["size"] == manifest["size"]:
+        return True
+
+    # mtime moved (copy, touch, checkout): only rebuild if the content changed
+    if stamp["size"] == manifest["size"] and _file_hash(source) == manifest["sha1"]:
+        manifest.update(stamp)
+        _write_manifest(manifest_path, manifest)
+        return True
+    return False
+
+
+def _write_arrow(path, table):
+    # Write next to the target and swap so readers never see a half written file
+    tmp_path = path + ".tmp"
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+def _read_arrow(path):
+    # Uncompressed IPC files are memory mapped, no text parsing happens here. The
+    # buffers keep the mapping alive after the file handle is closed
+    with pa.memory_map(path, "r") as source:
+        return ipc.open_file(source).read_all()
+
+
+def build_table(data_dir, filename):
+    """Parse one CSV with its typed schema and write it as an uncompressed Arrow file."""
+    source = os.path.join(data_dir, filename)
+    arrow_path, manifest_path = _cache_paths(data_dir, filename)
+    os.makedirs(os.path.dirname(arrow_path), exist_ok=True)
+
+    df = apply_schema(pd.read_csv(source), filename)
+    _write_arrow(arrow_path, pa.Table.from_pandas(df, preserve_index=False))
+
+    # A rebuild from the CSV already contains every appended part
+    old = _read_manifest(manifest_path) or {}
+    for part in old.get("parts", []):
+        try:
+            os.remove(os.path.join(os.path.dirname(arrow_path), part))
+        except OSError:
+            pass
+
+    manifest = {"source": filename, "schema_version": SCHEMA_VERSION, "sha1": _file_hash(source), "parts": []}
+    manifest.update(_source_stamp(source))
+    _write_manifest(manifest_path, manifest)
+    return df
+
+
+def append_part(data_dir, filename, rows):
+    """Store typed rows that were just appended to the CSV as a new cache part.
+
+    Must be called right after the CSV append, and only if the cache was
+    fresh before it. The manifest then points at the grown CSV without
+    re-hashing it.
+    """
+    arrow_path, manifest_path = _cache_paths(data_dir, filename)
+    manifest = _read_manifest(manifest_path)
+    base_schema = _read_arrow(arrow_path).schema
+
+    table = pa.Table.from_pandas(rows, preserve_index=False)
+    table = table.select(base_schema.names).cast(base_schema)
+
+    stem = os.path.splitext(filename)[0]
+    part = f"{stem}.part-{len(manifest.get('parts', [])) + 1:04d}.arrow"
+    _write_arrow(os.path.join(os.path.dirname(arrow_path), part), table)
+
+    manifest.setdefault("parts", []).append(part)
+    manifest.update(_source_stamp(os.path.join(data_dir, filename)))
+    # The content hash no longer describes the grown file; a touched CSV rebuilds
+    manifest["sha1"] = None
+    _write_manifest(manifest_path, manifest)
+
+
+def _project(table, columns):
+    # Unselected columns stay untouched pages of the mapped file
+    if columns is None:
+        return table
+    return table.select([name for name in table.column_names if name in columns])
+
+
+def read_table(data_dir, filename, columns=None):
+    arrow_path, manifest_path = _cache_paths(data_dir, filename)
+    manifest = _read_manifest(manifest_path) or {}
+    tables = [_read_arrow(arrow_path)]
+    tables += [_read_arrow(os.path.join(os.path.dirname(arrow_path), part)) for part in manifest.get("parts", [])]
+    tables = [_project(table, columns) for table in tables]
+    # Parts carry their own dictionaries, unify them so labels stay categorical
+    table = tables[0] if len(tables) == 1 else pa.concat_tables(tables).unify_dictionaries()
+    # One block per column: fixed-width columns without nulls (ids, timestamps,
+    # category codes) stay read-only views of the mapped file, so every process
+    # mapping the same cache shares those pages through the OS page cache
+    return table.to_pandas(split_blocks=True)
+
+
+def mapped_bytes(df):
+    """Bytes of `df` served straight from a mapped cache file (read-only views)."""
+    total = 0
+    for col in df.columns:
+        values = df[col].array
+        data = values.codes if isinstance(values, pd.Categorical) else df[col].to_numpy()
+        if isinstance(data, np.ndarray) and not data.flags.writeable:
+            total += data.nbytes
+    return total
+
+
+def load_table(data_dir, filename, columns=None):
+    """Typed table from the cache (built first if stale), limited to `columns` when given."""
+    if not is_fresh(data_dir, filename):
+        # Read back through the map rather than keeping the freshly parsed private copy
+        build_table(data_dir, filename)
+    return read_table(data_dir, filename, columns)
+
+
+def build_cache(data_dir, filenames, force=False):
+    built = []
+    for filename in filenames:
+        if not os.path.exists(os.path.join(data_dir, filename)):
+            print(f"skip {filename}: not found in {data_dir}")
+            continue
+        if force or not is_fresh(data_dir, filename):
+            build_table(data_dir, filename)
+            built.append(filename)
+            print(f"built {filename}")
+        else:
+            print(f"fresh {filename}")
+    return built
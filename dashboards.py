@@ -0,0 +1,25 @@
+"""The dashboards of the app menu.
+
+Importing this module loads every renderer, and with them pandas, plotly and
+the data layer, and registers the columns each renderer declares. main_app
+imports it only after login, so the login screen needs Streamlit alone.
+"""
+from ceo.ceo_tab import render_ceo_dashboard
+from data_loader import tables_for
+from investor_tab import render_investor_dashboard
+from marketing_manager.marketing_tab import render_marketing_dashboard
+from website_manager_tab import render_website_manager_dashboard
+
+# Menu label -> renderer
+DASHBOARDS = {
+    "CEO Dashboard": render_ceo_dashboard,
+    "Marketing Director": render_marketing_dashboard,
+    "Website Manager": render_website_manager_dashboard,
+    "Investor Dashboard": render_investor_dashboard,
+}
+
+
+def render(menu):
+    # Each renderer gets only the tables it declared, read on first use
+    renderer = DASHBOARDS[menu]
+    renderer(*tables_for(renderer))
@@ -1,48 +1,255 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
+import functools
+import hashlib
 import os
+import sys
+import threading
 
-# Sql server connection function
-# cache connection to the database to avoid slow reloads
+import columnar_cache
+import ingest
+from analytics.attribution import attribute, touchpoints
+from analytics.cohorts import Cohorts, acquisition_for
+from analytics.order_sequence import add_order_sequence
+from analytics.path_trie import PathTrie
+from analytics.session_index import pageview_index, session_sets, sorted_member
+from analytics.paths import build_session_paths
+from profiler import profiled
+from dataset import Dataset, concat_rows, register_incremental, required_columns, requires
+from schema import add_period_columns, apply_schema, compact_dtypes
 
-@st.cache_data
-def load_csv(filename):
-    return pd.read_csv(os.path.join("Data", filename))
+DATA_DIR = os.environ.get("DASHBOARD_DATA_DIR", "Data")
+# Set DASHBOARD_COLUMNAR_CACHE=0 to always parse the CSVs
+USE_COLUMNAR_CACHE = os.environ.get("DASHBOARD_COLUMNAR_CACHE", "1") != "0"
+
+# Set DASHBOARD_COMPACT_DTYPES=1 for bool flags, float32 money and more categories
+# (several workers per box); totals then carry float32 rounding in the cents
+COMPACT_DTYPES = os.environ.get("DASHBOARD_COMPACT_DTYPES", "0") == "1"
+
+# Logical table name -> file in DATA_DIR
+TABLE_FILES = {
+    "orders": "orders360.csv",
+    "order_items": "order_items.csv",
+    "refunds": "order_item_refunds.csv",
+    "products": "products.csv",
+    "pageviews": "website_pageviews.csv",
+    "sessions": "websitesession360.csv",
+    "customers": "customers360.csv",
+}
+DATA_FILES = list(TABLE_FILES.values())
+
+# Columns the loader derives other columns from, parsed even if nobody declared them
+SOURCE_COLUMNS = {
+    "orders": {"order_date", "order_id", "user_id"},
+    "sessions": {"session_created_at"},
+}
+
+def table_columns(name):
+    """Columns to parse for a table: everything declared with dataset.requires, None for all."""
+    columns = required_columns(name)
+    if columns is None:
+        return None
+    return set(columns) | SOURCE_COLUMNS.get(name, set())
+
+# filename -> (bytes before, bytes after) of the last compacted load
+MEMORY_REPORT = {}
+
+def frame_bytes(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+def read_table(filename, columns=None, compact=None):
+    return _prepare_table(_read_typed(filename, columns), filename, compact)
+
+def _read_typed(filename, columns=None):
+    # Timestamps are parsed exactly once here, tabs should never call pd.to_datetime
+    if USE_COLUMNAR_CACHE and columnar_cache.cache_available():
+        return columnar_cache.load_table(DATA_DIR, filename, columns)
+    usecols = None if columns is None else (lambda col: col.lstrip("\ufeff") in columns)
+    return apply_schema(pd.read_csv(os.path.join(DATA_DIR, filename), usecols=usecols), filename)
+
+def _prepare_table(df, filename, compact=None):
+    if COMPACT_DTYPES if compact is None else compact:
+        before = frame_bytes(df)
+        df = compact_dtypes(df, filename)
+        MEMORY_REPORT[filename] = (before, frame_bytes(df))
+    df = add_period_columns(df, filename)
+    if filename == TABLE_FILES["orders"]:
+        df = add_order_sequence(df)
+    return df
+
+def dataset_version():
+    stamps = []
+    for filename in DATA_FILES:
+        path = os.path.join(DATA_DIR, filename)
+        if os.path.exists(path):
+            stamps.append(f"{filename}:{os.stat(path).st_mtime_ns}")
+    return hashlib.sha1("|".join(stamps).encode()).hexdigest()[:12]
+
+# One copy per process: cache_resource hands every session the same object
+# instead of unpickling a fresh copy of each frame like cache_data does
+@st.cache_resource(show_spinner="Loading data...")
+def _dataset_store():
+    # Nothing is read here: each table is parsed, with only its declared columns, on first use
+    loaders = {name: functools.partial(_load_table, name) for name in TABLE_FILES}
+    dataset = Dataset({}, dataset_version(), loaders)
+    # Cubes, indexes and features are built in the background, see warmup.py
+    return {"dataset": dataset, "lock": threading.Lock()}
+
+def _load_table(name):
+    return read_table(TABLE_FILES[name], table_columns(name))
+
+def tables_for(render):
+    """Views of the tables a renderer declared with dataset.requires, in parameter order."""
+    dataset = get_dataset()
+    return [dataset.table(name) for name in render.tables]
+
+def get_dataset():
+    return _dataset_store()["dataset"]
+
+def refresh_dataset():
+    """Fold files waiting in Data/incoming into the shared dataset.
+
+    Returns the rows added per table and the files skipped as naming no known table.
+    """
+    store = _dataset_store()
+    with store["lock"]:
+        dataset, added, skipped = ingest.ingest_pending(store["dataset"], DATA_DIR, TABLE_FILES)
+        if added:
+            # Sessions pick up the new object on their next rerun
+            store["dataset"] = dataset
+    return added, skipped
 
 def load_all_data():
-    orders = load_csv("orders360.csv")
-    order_items = load_csv("order_items.csv")
-    refunds = load_csv("order_item_refunds.csv")
-    products = load_csv("products.csv")
-    pageviews = load_csv("website_pageviews.csv")
-    website_session = load_csv("websitesession360.csv")
-    customers = load_csv("customers360.csv")
+    dataset = get_dataset()
+    orders = dataset.table("orders")
+    order_items = dataset.table("order_items")
+    refunds = dataset.table("refunds")
+    products = dataset.table("products")
+    pageviews = dataset.table("pageviews")
+    website_session = dataset.table("sessions")
+    customers = dataset.table("customers")
 
     return orders, order_items, refunds, products, pageviews, website_session, customers
 
+# Profiled outside the cache, so hits are timed too
+@profiled
 @st.cache_data(show_spinner=False)
 def preprocess_session_path_data(website_pageviews):
-    website_pageviews['created_at'] = pd.to_datetime(website_pageviews['created_at'])
-
-    # Session paths
-    session_paths = (
-        website_pageviews.sort_values(['website_session_id', 'created_at'])
-        .groupby('website_session_id')['pageview_url']
-        .apply(lambda x: ' → '.join(x))
-        .reset_index()
-    )
-
-    # Session durations
-    session_duration = (
-        website_pageviews.groupby('website_session_id')['created_at']
-        .agg(session_start='min', session_end='max')
-        .reset_index()
-    )
-    session_duration['session_duration_min'] = (
-        (session_duration['session_end'] - session_duration['session_start']).dt.total_seconds() / 60
-    )
-
-    # Combine both
-    combined = session_paths.merge(session_duration, on='website_session_id')
-   
-    return combined
\ No newline at end of file
+    return build_session_paths(website_pageviews)
+
+@requires(pageviews=["website_session_id", "created_at", "pageview_url"])
+def session_paths(dataset):
+    # Path + duration table over every pageview, kept up to date by ingestion
+    return dataset.derived("session_paths", lambda ds: build_session_paths(ds.table("pageviews")))
+
+def _update_session_paths(paths, dataset, name, rows):
+    if name != "pageviews":
+        return paths
+    # Only sessions that got new pageviews are rebuilt, the rest is kept as is
+    touched = np.unique(rows["website_session_id"].dropna().to_numpy(dtype=np.int64))
+    rebuilt = build_session_paths(pageview_index(dataset).take(touched))
+    kept = paths[~sorted_member(touched, paths["website_session_id"].to_numpy())]
+    # concat_rows appends unseen paths to the dictionary, existing path ids stay valid
+    merged = concat_rows(kept, rebuilt).sort_values("website_session_id", ignore_index=True)
+    return merged.assign(path_id=merged["pageview_url"].cat.codes.astype(np.int32))
+
+register_incremental("session_paths", _update_session_paths)
+
+def _paths_by_start(dataset):
+    # Row order of the path table by session_start, date ranges become two binary searches
+    def build(ds):
+        starts = session_paths(ds)["session_start"].to_numpy()
+        order = np.argsort(starts, kind="stable")
+        return order, starts[order]
+    return dataset.derived("paths_by_start", build)
+
+# Keyed on small descriptors (dataset version, date range, filter values) so a
+# slider move never hashes a pageview frame; results are shared read-only
+@st.cache_resource(show_spinner=False, max_entries=32)
+def session_paths_for(version, date_range, selection=()):
+    """Slice of the full path table: sessions starting inside `date_range`.
+
+    `selection` is a tuple of (session column, values) pairs resolved through
+    the session id sets, e.g. (("device_type", ("mobile",)),).
+    """
+    dataset = get_dataset()
+    paths = session_paths(dataset)
+    order, starts = _paths_by_start(dataset)
+    lo = np.searchsorted(starts, np.datetime64(pd.Timestamp(date_range[0])), side="left")
+    hi = np.searchsorted(starts, np.datetime64(pd.Timestamp(date_range[1])), side="right")
+    rows = np.sort(order[lo:hi])
+    if selection:
+        ids = session_sets(dataset).ids_for(**{col: list(values) for col, values in selection})
+        rows = rows[sorted_member(ids, paths["website_session_id"].to_numpy()[rows])]
+    return paths.iloc[rows]
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+@requires(orders=["user_id", "order_date", "price_usd", "cogs_usd", "refund_amount_usd"])
+def cohorts_for(version, basis="order", channels=()):
+    """Cohort matrices for users acquired through `channels` (all when empty)."""
+    dataset = get_dataset()
+    acquired = acquisition_for(dataset, basis)
+    if channels:
+        acquired = acquired[acquired["utm_source"].isin(channels)]
+    return Cohorts.build(dataset.table("orders"), acquired)
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+@requires(orders=["user_id", "order_date", "price_usd", "product_name", "utm_source", "device_type"])
+def attribution_for(version, model, by="utm_source", selection=(), date_range=None):
+    """Attributed orders/revenue per channel for the orders matching the filter descriptors.
+
+    `selection` is a tuple of (order column, values) pairs, empty values mean all.
+    """
+    dataset = get_dataset()
+    return attribute(_selected_orders(dataset, selection, date_range), touchpoints(dataset), model, by)
+
+def _selected_orders(dataset, selection, date_range=None):
+    # Same rows as the Marketing sidebar filter (ceo.filter.apply_filter)
+    orders = dataset.table("orders")
+    mask = np.ones(len(orders), dtype=bool)
+    for col, values in selection:
+        if values:
+            mask &= orders[col].isin(values).to_numpy()
+    if date_range is not None:
+        mask &= ((orders["order_date"] >= date_range[0]) & (orders["order_date"] <= date_range[1])).to_numpy()
+    return orders[mask]
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+@requires(orders=["website_session_id", "order_date", "product_name", "utm_source", "device_type"])
+def path_trie_for(version, date_range, selection=(), order_selection=()):
+    """Prefix trie of the session_paths_for slice with the same key; sessions convert
+    through the orders matching `order_selection` in the date range."""
+    converted = _selected_orders(get_dataset(), order_selection, date_range)["website_session_id"].dropna()
+    return PathTrie.build(session_paths_for(version, date_range, selection), converted)
+
+def memory_report():
+    """Per table: bytes of the full typed table against the projected, compacted one, and
+    how much of the projected table is shared pages of the mapped cache."""
+    rows = []
+    for name, filename in TABLE_FILES.items():
+        if not os.path.exists(os.path.join(DATA_DIR, filename)):
+            continue
+        # Read once; every variant is prepared from a projection of the typed table
+        typed = _read_typed(filename)
+        columns = table_columns(name)
+        keep = [col for col in typed.columns if columns is None or col in columns]
+        slim = frame_bytes(_prepare_table(typed[keep], filename, compact=True))
+        shared = _prepare_table(typed[keep], filename)
+        full = frame_bytes(_prepare_table(typed, filename, compact=False))
+        rows.append({"table": name, "full_bytes": full, "compact_bytes": slim, "saved_bytes": full - slim,
+                     "saved_pct": round((full - slim) / full * 100, 1) if full else 0.0,
+                     "mapped_bytes": columnar_cache.mapped_bytes(shared) if columnar_cache.cache_available() else 0})
+    return pd.DataFrame(rows)
+
+if __name__ == "__main__":
+    # Memory check: python data_loader.py --memory-report
+    if "--memory-report" in sys.argv:
+        # Importing the renderers registers the columns they declare
+        import dashboards  # noqa: F401
+        print(memory_report().to_string(index=False))
+    # Build step: python data_loader.py --build-cache [--force]
+    if "--build-cache" in sys.argv:
+        if not columnar_cache.cache_available():
+            sys.exit("pyarrow is required to build the columnar cache")
+        columnar_cache.build_cache(DATA_DIR, DATA_FILES, force="--force" in sys.argv)
@@ -0,0 +1,126 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+# Derived structure name -> fn(old_value, new_dataset, table_name, rows) that
+# folds appended rows into the old value, see Dataset.append
+INCREMENTAL = {}
+
+
+def register_incremental(name, update):
+    INCREMENTAL[name] = update
+
+
+# Table name -> columns read by some renderer or derived structure, see requires()
+REQUIRED_COLUMNS = {}
+
+
+def requires(**tables):
+    """Declare the tables and columns a function reads, e.g. @requires(orders=["order_id"]).
+
+    Tables are only parsed with the union of declared columns, so every column a
+    function touches must be listed; None asks for all of them. Renderers list
+    their tables in parameter order (see data_loader.tables_for).
+    """
+    def decorator(fn):
+        for name, columns in tables.items():
+            if columns is None or REQUIRED_COLUMNS.get(name, ()) is None:
+                REQUIRED_COLUMNS[name] = None
+            else:
+                REQUIRED_COLUMNS.setdefault(name, set()).update(columns)
+        fn.tables = list(tables)
+        return fn
+    return decorator
+
+
+def required_columns(name):
+    # Tables nobody declared are read whole
+    return REQUIRED_COLUMNS.get(name)
+
+
+def concat_rows(frame, rows):
+    """Append rows to a frame, growing categories instead of falling back to object."""
+    rows = rows.reindex(columns=frame.columns)
+    for col in frame.columns:
+        if isinstance(frame[col].dtype, pd.CategoricalDtype):
+            cats = frame[col].cat.categories
+            extra = pd.Index(rows[col].dropna().astype(object).unique()).difference(cats)
+            dtype = pd.CategoricalDtype(cats.append(extra))
+            # add_categories keeps the existing codes, no recoding of old rows
+            frame = frame.assign(**{col: frame[col].cat.add_categories(extra)})
+            rows = rows.assign(**{col: rows[col].astype(object).astype(dtype)})
+        elif frame[col].dtype in (np.float32, np.bool_) and rows[col].notna().all():
+            # Keep compacted columns compact instead of letting concat upcast them
+            rows = rows.assign(**{col: rows[col].astype(frame[col].dtype)})
+    return pd.concat([frame, rows], ignore_index=True)
+
+
+class Dataset:
+    """Read-only handle on the loaded tables, shared by every session of the process.
+
+    Renderers never see the stored frames themselves. `table()` hands out a
+    shallow view: adding or overwriting columns on it only changes the view,
+    and Copy-on-Write copies a column the first time a view writes into it
+    (always on from pandas 3; main_app turns it on for older versions).
+    Tables given as `loaders` (name -> zero-argument callable) are read on
+    first access.
+    """
+
+    def __init__(self, tables, version, loaders=None):
+        self._tables = dict(tables)
+        self._loaders = {name: load for name, load in (loaders or {}).items() if name not in self._tables}
+        self._derived = {}
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self.version = version
+
+    def __contains__(self, name):
+        return name in self._tables or name in self._loaders
+
+    def _lock(self, key):
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _frame(self, name):
+        if name not in self._tables:
+            with self._lock(("table", name)):
+                if name not in self._tables:
+                    self._tables[name] = self._loaders[name]()
+        return self._tables[name]
+
+    def loaded(self):
+        return list(self._tables)
+
+    def table(self, name):
+        return self._frame(name).copy(deep=False)
+
+    def derived(self, name, build):
+        """Structure computed from the tables once and kept for the dataset's lifetime.
+
+        Safe to call from several threads: one builds, the others wait for it.
+        """
+        if name in self._derived:
+            return self._derived[name]
+        with self._lock(name):
+            if name not in self._derived:
+                self._derived[name] = build(self)
+        return self._derived[name]
+
+    def append(self, name, rows, version):
+        """New dataset with `rows` appended to one table.
+
+        Derived structures that registered an incremental update are carried
+        over and updated from the new rows only; the rest are dropped and get
+        rebuilt on next use.
+        """
+        tables = dict(self._tables)
+        tables[name] = concat_rows(self._frame(name), rows)
+        # Tables never read keep their loader, they will see the grown source files
+        dataset = Dataset(tables, version, self._loaders)
+        # Registration order, so indexes are updated before the structures using them
+        for key, update in INCREMENTAL.items():
+            if key in self._derived:
+                dataset._derived[key] = update(self._derived[key], dataset, name, rows)
+        return dataset
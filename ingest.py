@@ -0,0 +1,114 @@
+import glob
+import os
+import shutil
+import sys
+import time
+
+import pandas as pd
+
+import columnar_cache
+from analytics.order_sequence import extend_order_sequence
+from dataset import requires
+from schema import DATE_FORMAT, add_period_columns, apply_schema
+
+# New rows are dropped as Data/incoming/<table>-<anything>.csv, e.g. pageviews-2015-03-20.csv
+INCOMING_DIRNAME = "incoming"
+
+# Rows whose key already exists are skipped, so re-dropping a file is harmless
+APPEND_KEYS = {
+    "pageviews": "website_pageview_id",
+    "sessions": "website_session_id",
+    "orders": "order_id",
+    "order_items": "order_item_id",
+    "refunds": "order_item_refund_id",
+}
+
+
+def pending_files(data_dir):
+    incoming = os.path.join(data_dir, INCOMING_DIRNAME)
+    return sorted(glob.glob(os.path.join(incoming, "*.csv")))
+
+
+def table_for(path):
+    name = os.path.basename(path).split("-")[0]
+    return name if name in APPEND_KEYS else None
+
+
+def _existing_keys(existing, key, new_keys):
+    # Ids grow over time: only keys at or below the current max can be duplicates
+    if len(existing) == 0:
+        return pd.Series(False, index=new_keys.index)
+    maybe_dup = new_keys <= existing[key].max()
+    dup = pd.Series(False, index=new_keys.index)
+    if maybe_dup.any():
+        dup[maybe_dup] = new_keys[maybe_dup].isin(existing[key])
+    return dup
+
+
+def append_rows(data_dir, filename, key, raw, existing):
+    """Append new raw CSV rows to the source file and the columnar cache.
+
+    Returns the typed rows that were actually new.
+    """
+    raw = raw[~_existing_keys(existing, key, raw[key])].drop_duplicates(subset=key)
+    if raw.empty:
+        return raw
+
+    source = os.path.join(data_dir, filename)
+    header = pd.read_csv(source, nrows=0).columns.str.lstrip("\ufeff")
+    use_cache = columnar_cache.cache_available() and columnar_cache.is_fresh(data_dir, filename)
+
+    typed = apply_schema(raw.copy(), filename)
+    # The CSV stays the source of truth, written back in the export's own format
+    typed.reindex(columns=header).to_csv(
+        source, mode="a", header=False, index=False, date_format=DATE_FORMAT
+    )
+    if use_cache:
+        columnar_cache.append_part(data_dir, filename, typed.reindex(columns=header))
+    return add_period_columns(typed, filename)
+
+
+# Duplicate checks read each table's key, ingested orders extend the user order sequence
+@requires(**{name: [key] for name, key in APPEND_KEYS.items()})
+def ingest_pending(dataset, data_dir, table_files):
+    """Fold every pending incoming file into CSV, cache and dataset.
+
+    Returns the updated dataset, the number of new rows per table and the files
+    left in place because they name no known table. Derived structures are
+    updated from the new rows only (see Dataset.append).
+    """
+    added = {}
+    skipped = []
+    for path in pending_files(data_dir):
+        name = table_for(path)
+        if name is None:
+            skipped.append(path)
+            continue
+
+        rows = append_rows(data_dir, table_files[name], APPEND_KEYS[name], pd.read_csv(path), dataset.table(name))
+        if len(rows) and name == "orders":
+            rows = extend_order_sequence(dataset.table(name), rows)
+        if len(rows):
+            dataset = dataset.append(name, rows, f"{dataset.version}+{int(time.time())}")
+            added[name] = added.get(name, 0) + len(rows)
+
+        done = os.path.join(os.path.dirname(path), "done")
+        os.makedirs(done, exist_ok=True)
+        shutil.move(path, os.path.join(done, os.path.basename(path)))
+    return dataset, added, skipped
+
+
+if __name__ == "__main__":
+    # Offline ingestion: python ingest.py  (the app picks the rows up via its refresh button)
+    from data_loader import DATA_DIR, TABLE_FILES, read_table
+    from dataset import Dataset
+
+    pending = pending_files(DATA_DIR)
+    if not pending:
+        sys.exit("nothing to ingest")
+    tables = {name: read_table(TABLE_FILES[name]) for name in {table_for(path) for path in pending} - {None}}
+    _, added, skipped = ingest_pending(Dataset(tables, "offline"), DATA_DIR, TABLE_FILES)
+    for path in skipped:
+        print(f"skip {path}: unknown table")
+    for name, count in added.items():
+        print(f"{name}: {count} new rows")
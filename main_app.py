@@ -1,10 +1,8 @@
 
-from data_loader import load_all_data
-from ceo.ceo_tab import render_ceo_dashboard
-from website_manager_tab import render_website_manager_dashboard
-from investor_tab import render_investor_dashboard
-from marketing_manager.marketing_tab import render_marketing_dashboard
-from Login import login
+import os
+
+import memo
+from Login import ADMINS, login
 from Home import show_home
 import streamlit as st
 
@@ -26,66 +24,70 @@ st.markdown(
 )
 
 
-# laod Data
-orders, order_items, refunds, products, web_pageview, website_session, customers = load_all_data()
-
-# Store data with original names (no renaming in session_state)
-st.session_state.website_sessions = website_session
-st.session_state.web_pageview = web_pageview
-st.session_state.orders = orders
-st.session_state.order_items = order_items
-st.session_state.products = products
-st.session_state.customers = customers
-st.session_state.refunds = refunds
-
-
 # Set up the Streamlit page configuration
 
 def rerun_app():
      raise st.script_runner.RerunException(st.script_request_queue.RerunData(None))
 
 def main():
+    # Aggregations repeated across charts of this rerun are computed once
+    rerun_memo = memo.begin_rerun()
     #st.set_page_config(page_title="Analytics Dashboard", layout="wide")
-    # laod Data
-    orders, order_items, refunds, products, web_pageview, website_session, customers = load_all_data()
-    
     if "logged_in" not in st.session_state:
         st.session_state.logged_in = False
 
+    # The login screen never touches the data
     if not st.session_state.logged_in:
         login()
         st.stop()  # avoid rerun errors 
 
     else:
+        # pandas, plotly and the data layer load here, on the first rerun after
+        # login; later reruns find them already imported
+        import pandas as pd
+        # Copy-on-Write is always on from pandas 3; the shared tables rely on it (see dataset.Dataset)
+        if int(pd.__version__.split(".")[0]) < 3:
+            pd.set_option("mode.copy_on_write", True)
+        import dashboards
+        from data_loader import refresh_dataset
+        from profiler import flush_profile_log, profiler_panel
+        from session_context import session_context
+        from warmup import start_warmup, warmup_progress
+
+        # Aggregates for every tab are built in the background from here on
+        warmup = start_warmup(session_context().version)
         with st.sidebar:
             st.markdown(f"👤 Logged in as: **{st.session_state.get('username', 'User')}**")
             if st.button("Logout"):
                 st.session_state.clear()
                 st.success("Logged out. Please reload to log in again.")
                 st.stop()
-
-
-        # Store data with original names (no renaming in session_state)
-        st.session_state.website_sessions = website_session
-        st.session_state.web_pageview = web_pageview
-        st.session_state.orders = orders
-        st.session_state.order_items = order_items
-        st.session_state.products = products
-        st.session_state.customers = customers
-        st.session_state.refunds = refunds
+            # Appends files waiting in Data/incoming without reloading the history
+            if st.button("🔄 Refresh data"):
+                added, skipped = refresh_dataset()
+                if added:
+                    st.success("Added " + ", ".join(f"{n:,} {t}" for t, n in added.items()))
+                else:
+                    st.info("No new data")
+                if skipped:
+                    st.warning("Skipped, no known table: " + ", ".join(os.path.basename(path) for path in skipped))
+            if not warmup.finished:
+                warmup_progress()
+            elif warmup.errors:
+                st.caption("⚠️ Warm-up skipped: " + ", ".join(warmup.errors))
 
         #Navigation
-        menu = st.sidebar.selectbox("Go to", ["Home", "CEO Dashboard", "Marketing Director", "Website Manager", "Investor Dashboard"])
+        menu = st.sidebar.selectbox("Go to", ["Home"] + list(dashboards.DASHBOARDS))
         if menu == "Home":
             show_home()
-        elif menu == "CEO Dashboard":
-            render_ceo_dashboard(orders,order_items,refunds,products,web_pageview,website_session)
-        elif menu=="Marketing Director":
-            render_marketing_dashboard(orders,website_session,web_pageview)
-        elif menu == "Website Manager":
-            render_website_manager_dashboard(website_session,web_pageview,orders)
-        elif menu == "Investor Dashboard":
-            render_investor_dashboard(website_session,orders,web_pageview)
+        else:
+            dashboards.render(menu)
+        if rerun_memo.misses:
+            st.sidebar.caption(f"♻️ {rerun_memo.hits} of {rerun_memo.hits + rerun_memo.misses} chart aggregations reused")
+        # Last, so the table already holds this rerun's calls
+        if st.session_state.get("username") in ADMINS:
+            profiler_panel()
+        flush_profile_log()
             
 
 if __name__ == "__main__":
@@ -2,7 +2,11 @@ import streamlit as st
 import pandas as pd
 from ceo.filter import apply_filter
 from ceo.base_kpi import calculate_kpis
-from data_loader import preprocess_session_path_data
+from chart_pool import is_open, submit, tabs
+from dataset import requires
+from profiler import profile, profiled
+from data_loader import attribution_for, get_dataset, path_trie_for, session_paths, session_paths_for
+from session_context import session_context
 from .visuals import (
     line_chart_conversion_rate_1,
     pie_chart_total_sessions_1,
@@ -21,8 +25,14 @@ from .visuals import (
     column_chart_orders_by_session_path,
     line_column_revenue_orders_by_product,
     donut_units_sold_by_product,
-    bar_refunds_by_product
+    bar_refunds_by_product,
+    next_page_bar,
+    attribution_bar,
+    attribution_model_comparison
 )
+from analytics.attribution import ATTRIBUTION_MODELS
+from analytics.session_features import join_features, session_features
+from metrics.marketing import channel_kpi_matrix
 def human_format(num):
     if num >= 1_000_000:
         return f"{num/1_000_000:.2f}M"
@@ -32,127 +42,245 @@ def human_format(num):
         return str(num)
 
 
-def render_marketing_dashboard(order_data,website_sessions,website_pageviews):
+def path_explorer(trie, max_depth=6):
+    """Selectboxes drilling into the session paths page by page, with drop-off stats of the chosen prefix."""
+    prefix = []
+    cols = st.columns(max_depth)
+    for level in range(max_depth):
+        options = trie.children(trie.find(prefix))['page'].tolist()
+        if not options:
+            break
+        choice = cols[level].selectbox(f"Step {level + 1}", ["—"] + options, key=f"path_explorer_{level}")
+        if choice == "—":
+            break
+        prefix.append(choice)
+
+    node = trie.find(prefix)
+    if prefix:
+        stats = trie.drop_off(prefix)
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("Sessions Reaching", f"{stats['reached']:,}")
+        c2.metric("Dropped Here", f"{stats['dropped']:,}")
+        c3.metric("Drop-off Rate", f"{stats['drop_off_rate_pct']:.1f}%")
+        c4.metric("Conversions", f"{stats['conversions']:,}")
+
+    next_steps = trie.children(node)
+    if next_steps.empty:
+        st.info("No further pages after this step.")
+        return None
+    return next_page_bar(next_steps, trie.label(node))
+
+
+@profiled
+@requires(
+    orders=["order_id", "order_date", "website_session_id", "user_id", "items_purchased", "price_usd", "cogs_usd",
+            "refund_amount_usd", "utm_source", "utm_campaign", "utm_content", "device_type", "product_name"],
+)
+def render_marketing_dashboard(order_data):
     st.title("📢 Marketing Director Dashboard")
 
     # Filters
-    filters = apply_filter(order_data, website_pageviews, website_sessions)
+    dataset = get_dataset()
+    filters = apply_filter(order_data, dataset)
+    context = session_context()
+    context.set_filters("marketing", products=tuple(filters["selected_products"]),
+                        sources=tuple(filters["selected_sources"]), devices=tuple(filters["selected_devices"]),
+                        date_range=tuple(filters["selected_date_range"]))
 
     filtered_order_data = filters["order_data"]
-    filtered_sessions = filters["sessions"]
-    filtered_pageviews = filters["pageviews"]
-
-    # KPIs
-    kpis = calculate_kpis(filtered_order_data, filtered_sessions, filtered_pageviews)
+    # The order filters as a cache key of the aggregates shared across sessions
+    order_selection = (("product_name", tuple(filters["selected_products"])),
+                       ("utm_source", tuple(filters["selected_sources"])),
+                       ("device_type", tuple(filters["selected_devices"])))
+    # Pageview counts, bounce flags and durations are precomputed per session
+    filtered_sessions = join_features(filters["sessions"], session_features(dataset))
 
     # Tabs
-    tab1, tab2, tab3, tab4, tab5  = st.tabs([ "📈 Marketing Channel Performance", "📊 User Engagement", 
-                                             "Traffic Source & Segment Trends",
-                                             "Attribution & Conversion Journey",
-                                             "Product Analysis"])
+    tab1, tab2, tab3, tab4, tab5  = tabs([ "📈 Marketing Channel Performance", "📊 User Engagement", 
+                                          "Traffic Source & Segment Trends",
+                                          "Attribution & Conversion Journey",
+                                          "Product Analysis"], key="marketing_tabs")
 
-    with tab1:
+    # Charts of every open tab start now and are gathered where they are drawn.
+    # The attribution charts and the path explorer follow their widgets and stay inline
+    charts = {}
+    if is_open(tab1):
+        charts.update(
+            conversion=submit(line_chart_conversion_rate_1, filtered_order_data, filtered_sessions),
+            sessions=submit(pie_chart_total_sessions_1, filtered_sessions),
+            revenue=submit(bar_chart_gross_revenue_1, filtered_order_data),
+            channel_matrix=submit(channel_kpi_matrix, filtered_order_data, filtered_sessions, process=True),
+        )
+    if is_open(tab2):
+        # Sliced from the full-history path table, cached on the date range and the source/device
+        # filters (sessions carry no product, so the product filter reaches the paths through conversions)
+        path_selection = tuple((col, tuple(filters[key])) for col, key in
+                               (("utm_source", "selected_sources"), ("device_type", "selected_devices"))
+                               if filters[key])
+        combined_paths_data = context.fetch(session_paths_for, tuple(filters["selected_date_range"]),
+                                            path_selection)
+        charts.update(
+            avg_time=submit(line_column_avg_time_by_session_path, combined_paths_data),
+            bounce_campaign=submit(bounce_rate_stacked_column, filtered_sessions, process=True),
+            bounce_content=submit(bounce_rate_stacked_column_by_content, filtered_sessions, process=True),
+        )
+    if is_open(tab3):
+        charts.update(
+            sessions_over_time=submit(line_chart_total_sessions_over_time, filtered_sessions),
+            sessions_device=submit(clustered_bar_sessions_by_source_device, filtered_sessions),
+            sessions_campaign=submit(stacked_bar_sessions_by_source_campaign, filtered_sessions),
+            sessions_content=submit(stacked_bar_sessions_by_source_content, filtered_sessions),
+        )
+    if is_open(tab4):
+        # Full-history path table lives on the dataset, ingestion keeps it current
+        session_path_data = session_paths(dataset)
+        charts.update(
+            orders_over_time=submit(line_chart_total_orders_over_time, filtered_order_data),
+            conversion_campaign=submit(stacked_bar_conversion_by_source_campaign, filtered_order_data, filtered_sessions),
+            conversion_content=submit(stacked_bar_conversion_by_source_content, filtered_order_data, filtered_sessions),
+            orders_by_path=submit(column_chart_orders_by_session_path, filtered_order_data, session_path_data),
+        )
+    if is_open(tab5):
+        charts.update(
+            revenue_orders=submit(line_column_revenue_orders_by_product, filtered_order_data),
+            units_sold=submit(donut_units_sold_by_product, filtered_order_data),
+            refunds=submit(bar_refunds_by_product, filtered_order_data),
+        )
 
-        col1, col2, col3 = st.columns(3)
-        col1.metric("🧾 Total Orders", f"{human_format(kpis['total_orders'])}")
-        col2.metric("💰 Gross Revenue", f"${human_format(kpis['gross_revenue'])}")
-        col3.metric("📈 Gross Profit %", f"{kpis['gross_profit_pct']:.2f}%")
+    # KPIs, while the charts compute
+    kpis = calculate_kpis(filtered_order_data, filtered_sessions)
+
+    if is_open(tab1):
+        with tab1, profile("Marketing / Channel Performance"):
+
+            col1, col2, col3 = st.columns(3)
+            col1.metric("🧾 Total Orders", f"{human_format(kpis['total_orders'])}")
+            col2.metric("💰 Gross Revenue", f"${human_format(kpis['gross_revenue'])}")
+            col3.metric("📈 Gross Profit %", f"{kpis['gross_profit_pct']:.2f}%")
         
-        st.subheader("Conversion Rate Over Time")
-        line_chart_conversion_rate_1(filtered_order_data, filtered_sessions)
-
-        col1,col2=st.columns(2)
-        with col1:
-            st.subheader("Total Sessions by UTM Source")
-            pie_chart_total_sessions_1(filtered_sessions)
-
-        with col2:
-            st.subheader("Gross Revenue by UTM Source")
-            bar_chart_gross_revenue_1(filtered_order_data)
-
-        # chart 4    
-        st.markdown("## 📈 Channel Sources Vs KPIs")
-        channel_kpi_heatmap_plotly(filtered_order_data, filtered_sessions, filtered_pageviews)
-
-    with tab2:
-        col4, col5, col6 = st.columns(3)
-        col4.metric("🎯 Conversion Rate", f"{kpis['conversion_rate_pct']}%")
-        col5.metric("🕒 Avg. Session Duration (min)", kpis['avg_user_session_duration_min'])
-        col6.metric("❌ Bounce Rate", f"{kpis['bounce_rate_pct']}%")
+            st.subheader("Conversion Rate Over Time")
+            st.plotly_chart(charts["conversion"].result(), use_container_width=True)
+
+            col1,col2=st.columns(2)
+            with col1:
+                st.subheader("Total Sessions by UTM Source")
+                st.plotly_chart(charts["sessions"].result(), use_container_width=True)
+
+            with col2:
+                st.subheader("Gross Revenue by UTM Source")
+                st.plotly_chart(charts["revenue"].result(), use_container_width=True)
+
+            # chart 4    
+            st.markdown("## 📈 Channel Sources Vs KPIs")
+            channel_matrix = charts["channel_matrix"].result()
+            st.subheader("📊 Channel Matrix Heatmap (Plotly)")
+            st.plotly_chart(channel_kpi_heatmap_plotly(channel_matrix), use_container_width=True)
+            with st.expander("📄 View Raw KPI Table"):
+                st.dataframe(channel_matrix.round(2))
+
+    if is_open(tab2):
+        with tab2, profile("Marketing / User Engagement"):
+            col4, col5, col6 = st.columns(3)
+            col4.metric("🎯 Conversion Rate", f"{kpis['conversion_rate_pct']}%")
+            col5.metric("🕒 Avg. Session Duration (min)", kpis['avg_user_session_duration_min'])
+            col6.metric("❌ Bounce Rate", f"{kpis['bounce_rate_pct']}%")
         
-        # Precomputed once at app start
-        st.markdown("## 📈 Line + Column Chart – Avg Session Time & Count of sessions by session_path")
-        combined_paths_data = preprocess_session_path_data(filtered_pageviews)
-        # Visual in page
-        fig = line_column_avg_time_by_session_path(combined_paths_data)
-        st.plotly_chart(fig, use_container_width=True)
+            st.markdown("## 📈 Line + Column Chart – Avg Session Time & Count of sessions by session_path")
+            # Visual in page
+            fig = charts["avg_time"].result()
+            st.plotly_chart(fig, use_container_width=True)
+
+            # Path explorer over the prefix trie of the same sessions
+            st.markdown("## 🧭 Path Explorer – Where Sessions Go Next")
+            trie = context.fetch(path_trie_for, tuple(filters["selected_date_range"]), path_selection,
+                                 order_selection)
+            fig_paths = path_explorer(trie)
+            if fig_paths is not None:
+                st.plotly_chart(fig_paths, use_container_width=True)
         
     
-        col1,col2=st.columns(2)
-        with col1:
-        # Chart 2
-            st.markdown("## 📈 Stacked Column Chart – Bounce Rate % by utm_source and utm_campaign")
-            pageviews_per_session = filtered_pageviews.groupby("website_session_id").size().reset_index(name="pageview_count")
-            bounced = pageviews_per_session[pageviews_per_session["pageview_count"] == 1]["website_session_id"]
-            fig1 = bounce_rate_stacked_column(filtered_sessions, bounced)
-            st.plotly_chart(fig1, use_container_width=True)
+            col1,col2=st.columns(2)
+            with col1:
+            # Chart 2
+                st.markdown("## 📈 Stacked Column Chart – Bounce Rate % by utm_source and utm_campaign")
+                fig1 = charts["bounce_campaign"].result()
+                st.plotly_chart(fig1, use_container_width=True)
 
-        with col2:
-            #chart 3
-            st.markdown("## 📈 Stacked Column Chart – Bounce Rate % by utm_source and utm_content")
-            pageviews_per_session = filtered_pageviews.groupby("website_session_id").size().reset_index(name="pageview_count")
-            bounced = pageviews_per_session[pageviews_per_session["pageview_count"] == 1]["website_session_id"]
-            fig2 = bounce_rate_stacked_column_by_content(filtered_sessions, bounced)
-            st.plotly_chart(fig2, use_container_width=True)
+            with col2:
+                #chart 3
+                st.markdown("## 📈 Stacked Column Chart – Bounce Rate % by utm_source and utm_content")
+                fig2 = charts["bounce_content"].result()
+                st.plotly_chart(fig2, use_container_width=True)
+
+    if is_open(tab3):
+        with tab3, profile("Marketing / Traffic Trends"):
+            st.title("📊 Traffic Source & Segment Trends")
+            # Line Chart – Total Sessions by Year and Month
+
+            col1,col2=st.columns(2)
+            with col1:
+                st.plotly_chart(charts["sessions_over_time"].result(), use_container_width=True)
+            with col2:
+                # Clustered Bar – Total Sessions by utm_source and device_type
+                st.plotly_chart(charts["sessions_device"].result(), use_container_width=True)
+
+            col3,col4=st.columns(2)
+                # Stacked Bar – Sessions by utm_source and utm_campaign
+            with col3:
+                st.plotly_chart(charts["sessions_campaign"].result(), use_container_width=True)
+            with col4:
+                # Stacked Bar – Sessions by utm_source and utm_content
+                st.plotly_chart(charts["sessions_content"].result(), use_container_width=True)
 
-    with tab3:
-        st.title("📊 Traffic Source & Segment Trends")
-        # Line Chart – Total Sessions by Year and Month
-
-        col1,col2=st.columns(2)
-        with col1:
-            st.plotly_chart(line_chart_total_sessions_over_time(filtered_sessions), use_container_width=True)
-        with col2:
-            # Clustered Bar – Total Sessions by utm_source and device_type
-            st.plotly_chart(clustered_bar_sessions_by_source_device(filtered_sessions), use_container_width=True)
-
-        col3,col4=st.columns(2)
-            # Stacked Bar – Sessions by utm_source and utm_campaign
-        with col3:
-            st.plotly_chart(stacked_bar_sessions_by_source_campaign(filtered_sessions), use_container_width=True)
-        with col4:
-            # Stacked Bar – Sessions by utm_source and utm_content
-            st.plotly_chart(stacked_bar_sessions_by_source_content(filtered_sessions), use_container_width=True)
-
-    with tab4:
-        st.title("📊 Attribution & Conversion Journey")
-        col1,col2=st.columns(2)
-        with col1:
-            fig1 = line_chart_total_orders_over_time(filtered_order_data)
+    if is_open(tab4):
+        with tab4, profile("Marketing / Attribution & Conversion"):
+            st.title("📊 Attribution & Conversion Journey")
+
+            st.markdown("## 🧮 Multi-Touch Attribution")
+            col1, col2 = st.columns(2)
+            model = col1.selectbox("Attribution model", list(ATTRIBUTION_MODELS), format_func=ATTRIBUTION_MODELS.get)
+            channel = col2.selectbox("Credit by", ["utm_source", "utm_campaign", "utm_content", "device_type"])
+            # Cached per model, channel and sidebar filter set
+            attribution_key = dict(selection=order_selection, date_range=tuple(filters["selected_date_range"]))
+            attributed = context.fetch(attribution_for, model, channel, **attribution_key)
+            comparison = pd.concat(
+                [context.fetch(attribution_for, name, channel, **attribution_key).assign(model=label)
+                 for name, label in ATTRIBUTION_MODELS.items()],
+                ignore_index=True,
+            )
+            col1, col2 = st.columns(2)
+            with col1:
+                st.plotly_chart(attribution_bar(attributed, channel, ATTRIBUTION_MODELS[model]), use_container_width=True)
+            with col2:
+                st.plotly_chart(attribution_model_comparison(comparison, channel), use_container_width=True)
+
+            col1,col2=st.columns(2)
+            with col1:
+                fig1 = charts["orders_over_time"].result()
+                st.plotly_chart(fig1, use_container_width=True)
+            with col2:
+                fig2 = charts["conversion_campaign"].result()
+                st.plotly_chart(fig2, use_container_width=True)
+
+            col3,col4=st.columns(2)
+            with col3:
+                fig3 = charts["conversion_content"].result()
+                st.plotly_chart(fig3, use_container_width=True)
+            with col4:
+                # Visual: Total Orders by Session Path
+                fig4 = charts["orders_by_path"].result()
+                st.plotly_chart(fig4, use_container_width=True)
+
+    if is_open(tab5):
+        with tab5, profile("Marketing / Product Performance"):
+            st.title("📦 Product Performance Dashboard")
+            # Assume filtered_order_data is passed or available
+            fig1 = charts["revenue_orders"].result()
             st.plotly_chart(fig1, use_container_width=True)
-        with col2:
-            fig2 = stacked_bar_conversion_by_source_campaign(filtered_order_data, filtered_sessions)
-            st.plotly_chart(fig2, use_container_width=True)
 
-        col3,col4=st.columns(2)
-        with col3:
-            fig3 = stacked_bar_conversion_by_source_content(filtered_order_data, filtered_sessions)
-            st.plotly_chart(fig3, use_container_width=True)
-        with col4:
-            session_path_data = preprocess_session_path_data(website_pageviews)
-            # Visual: Total Orders by Session Path
-            fig4 = column_chart_orders_by_session_path(filtered_order_data, session_path_data)
-            st.plotly_chart(fig4, use_container_width=True)
-
-    with tab5:
-        st.title("📦 Product Performance Dashboard")
-        # Assume filtered_order_data is passed or available
-        fig1 = line_column_revenue_orders_by_product(filtered_order_data)
-        st.plotly_chart(fig1, use_container_width=True)
-
-        fig2 = donut_units_sold_by_product(filtered_order_data)
-        st.plotly_chart(fig2, use_container_width=True)
+            fig2 = charts["units_sold"].result()
+            st.plotly_chart(fig2, use_container_width=True)
 
        
-        fig3 = bar_refunds_by_product(filtered_order_data)
-        st.plotly_chart(fig3, use_container_width=True)
\ No newline at end of file
+            fig3 = charts["refunds"].result()
+            st.plotly_chart(fig3, use_container_width=True)
\ No newline at end of file
@@ -1,25 +1,16 @@
-
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import plotly.express as px
-import streamlit as st
-from sklearn.preprocessing import StandardScaler
 import plotly.graph_objects as go
+from metrics import marketing
+from profiler import profiled
 
+# Figure builders only: every aggregation comes from metrics.marketing, and
+# the caller puts the returned figure on the page
 
 # using plotly
 
+@profiled
 def line_chart_conversion_rate_1(order_data, website_sessions):
-    website_sessions['year_month'] = pd.to_datetime(website_sessions['session_created_at']).dt.to_period('M')
-    order_data['year_month'] = pd.to_datetime(order_data['order_date']).dt.to_period('M')
-
-    sessions_by_month = website_sessions.groupby('year_month')['website_session_id'].nunique().reset_index(name='total_sessions')
-    converted_by_month = order_data.groupby('year_month')['website_session_id'].nunique().reset_index(name='converted_sessions')
-
-    df = pd.merge(sessions_by_month, converted_by_month, on='year_month', how='left').fillna(0)
-    df['conversion_rate_pct'] = (df['converted_sessions'] / df['total_sessions']) * 100
-    df['year_month'] = df['year_month'].astype(str)
+    df = marketing.conversion_by_month(order_data, website_sessions)
 
     fig = px.line(
         df,
@@ -31,37 +22,20 @@ def line_chart_conversion_rate_1(order_data, website_sessions):
     )
     fig.update_traces(line=dict(color='green'))
     fig.update_layout(xaxis_tickangle=45)
+    return fig
 
-    st.plotly_chart(fig, use_container_width=True)
-
-
-def line_chart_conversion_rate_by_product(order_data, website_sessions):
-    # Ensure datetime format
-    website_sessions['year_month'] = pd.to_datetime(website_sessions['session_created_at']).dt.to_period('M')
-    order_data['year_month'] = pd.to_datetime(order_data['order_date']).dt.to_period('M')
-
-    # --- Total sessions per month ---
-    sessions_by_month = website_sessions.groupby('year_month')['website_session_id'].nunique().reset_index()
-    sessions_by_month.rename(columns={'website_session_id': 'total_sessions'}, inplace=True)
-
-    # --- Converted sessions per month and product ---
-    converted = order_data.groupby(['year_month', 'product_name'])['website_session_id'].nunique().reset_index()
-    converted.rename(columns={'website_session_id': 'converted_sessions'}, inplace=True)
-
-    # Merge sessions to get conversion rate
-    df = converted.merge(sessions_by_month, on='year_month', how='left')
-    df['conversion_rate_pct'] = (df['converted_sessions'] / df['total_sessions']) * 100
-    df['year_month'] = df['year_month'].astype(str)
 
-    # Product filter
-    all_products = df['product_name'].dropna().unique().tolist()
-    selected_products = st.multiselect("🧸 Select Products:", sorted(all_products), default=all_products)
+@profiled
+def line_chart_conversion_rate_by_product(order_data, website_sessions, products=None):
+    df = marketing.conversion_by_month_and_product(order_data, website_sessions)
 
-    filtered_df = df[df['product_name'].isin(selected_products)]
+    # Product filter, all products unless the caller picked some
+    if products is not None:
+        df = df[df['product_name'].isin(products)]
 
     # Plot using Plotly
     fig = px.line(
-        filtered_df,
+        df,
         x='year_month',
         y='conversion_rate_pct',
         color='product_name',
@@ -71,33 +45,25 @@ def line_chart_conversion_rate_by_product(order_data, website_sessions):
     )
 
     fig.update_layout(xaxis_tickangle=-45)
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
 
 
+@profiled
 def pie_chart_total_sessions_1(website_sessions):
-    data = website_sessions['utm_source'].fillna('Unknown')
-    data = data[data.str.upper() != 'NULL']
-    counts = data.value_counts().reset_index()
-    counts.columns = ['utm_source', 'sessions']
-
     fig = px.pie(
-        counts,
+        marketing.sessions_by_source(website_sessions),
         names='utm_source',
         values='sessions',
         title='Total Sessions by UTM Source',
         hole=0.3
     )
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
 
 
+@profiled
 def bar_chart_gross_revenue_1(order_data):
-    df = order_data[order_data['utm_source'].notna()]
-    df = df[df['utm_source'].str.upper() != 'NULL']
-    revenue = df.groupby('utm_source')['price_usd'].sum().reset_index()
-    revenue = revenue.sort_values(by='price_usd', ascending=False)
-
     fig = px.bar(
-        revenue,
+        marketing.revenue_by_source(order_data),
         x='utm_source',
         y='price_usd',
         text='price_usd',
@@ -107,49 +73,17 @@ def bar_chart_gross_revenue_1(order_data):
     )
     fig.update_traces(texttemplate='$%{text:,.0f}', textposition='outside')
     fig.update_layout(xaxis_tickangle=45, showlegend=False)
+    return fig
 
-    st.plotly_chart(fig, use_container_width=True)
-
-
-def channel_kpi_heatmap(order_data, website_sessions, website_pageviews):
-    # -- Bounce Rate --
-    pageviews_per_session = website_pageviews.groupby("website_session_id").size().reset_index(name="pageview_count")
-    bounced = pageviews_per_session[pageviews_per_session["pageview_count"] == 1]["website_session_id"]
-
-    session_info = website_sessions.copy()
-    session_info["is_bounce"] = session_info["website_session_id"].isin(bounced).astype(int)
-
-    channel_kpis = session_info.groupby("utm_source").agg(
-        total_sessions=('website_session_id', 'nunique'),
-        total_users=('user_id', 'nunique'),
-        bounce_sessions=('is_bounce', 'sum')
-    ).reset_index()
-
-    channel_kpis["bounce_rate_pct"] = (channel_kpis["bounce_sessions"] / channel_kpis["total_sessions"]) * 100
-    channel_kpis["sessions_per_user"] = channel_kpis["total_sessions"] / channel_kpis["total_users"]
-
-    # -- Order Metrics --
-    orders_summary = order_data.groupby("utm_source").agg(
-        orders=('order_id', 'nunique'),
-        revenue=('price_usd_item', 'sum'),
-        cogs=('cogs_usd_item', 'sum'),
-        buyers=('user_id', 'nunique')
-    ).reset_index()
-
-    orders_summary["aov"] = orders_summary["revenue"] / orders_summary["orders"]
-    orders_summary["gross_profit_pct"] = ((orders_summary["revenue"] - orders_summary["cogs"]) / orders_summary["revenue"]) * 100
-    orders_summary["conversion_rate_pct"] = (orders_summary["orders"] / channel_kpis["total_sessions"]) * 100
-
-    # -- Combine --
-    matrix = channel_kpis.merge(orders_summary, on="utm_source", how="left")
 
-    # -- Normalize KPIs (standardized heatmap)
-    metric_cols = ['total_sessions', 'bounce_rate_pct', 'aov', 'conversion_rate_pct', 'gross_profit_pct', 'sessions_per_user']
-    matrix_indexed = matrix.set_index('utm_source')[metric_cols]
+@profiled
+def channel_kpi_heatmap(matrix):
+    """Matplotlib version of the channel heatmap over `metrics.marketing.channel_kpi_matrix`."""
+    # Only this chart uses them, and together they take longer to import than the rest of the app
+    import matplotlib.pyplot as plt
+    import seaborn as sns
 
-    scaler = StandardScaler()
-    normalized = scaler.fit_transform(matrix_indexed)
-    normalized_df = pd.DataFrame(normalized, index=matrix_indexed.index, columns=matrix_indexed.columns)
+    normalized_df = marketing.channel_kpi_zscores(matrix)
 
     # -- Heatmap Plot
     fig, ax = plt.subplots(figsize=(12, 6))
@@ -163,57 +97,13 @@ def channel_kpi_heatmap(order_data, website_sessions, website_pageviews):
     )
     ax.set_title("Channel vs KPIs (Normalized per KPI)", fontsize=14)
     plt.tight_layout()
+    return fig
 
-    st.subheader("📊 Channel Matrix Heatmap")
-    st.pyplot(fig)
-    plt.clf()
-
-    return matrix  # optional: return raw data table
-
-
-def channel_kpi_heatmap_plotly(order_data, website_sessions, website_pageviews):
-    # Bounce rate setup
-    pageviews_per_session = website_pageviews.groupby("website_session_id").size().reset_index(name="pageview_count")
-    bounced = pageviews_per_session[pageviews_per_session["pageview_count"] == 1]["website_session_id"]
-
-    session_info = website_sessions.copy()
-    session_info["is_bounce"] = session_info["website_session_id"].isin(bounced).astype(int)
-
-    # Channel-based KPIs from session data
-    channel_kpis = session_info.groupby("utm_source").agg(
-        total_sessions=('website_session_id', 'nunique'),
-        total_users=('user_id', 'nunique'),
-        bounce_sessions=('is_bounce', 'sum')
-    ).reset_index()
-
-    channel_kpis["bounce_rate_pct"] = (channel_kpis["bounce_sessions"] / channel_kpis["total_sessions"]) * 100
-    channel_kpis["sessions_per_user"] = channel_kpis["total_sessions"] / channel_kpis["total_users"]
-
-    # Order metrics
-    orders_summary = order_data.groupby("utm_source").agg(
-        orders=('order_id', 'nunique'),
-        revenue=('price_usd', 'sum'),
-        cogs=('cogs_usd', 'sum'),
-        buyers=('user_id', 'nunique')
-    ).reset_index()
-
-    orders_summary["aov"] = orders_summary["revenue"] / orders_summary["orders"]
-    orders_summary["gross_profit_pct"] = ((orders_summary["revenue"] - orders_summary["cogs"]) / orders_summary["revenue"]) * 100
-    orders_summary["conversion_rate_pct"] = (orders_summary["orders"] / channel_kpis["total_sessions"]) * 100
-
-    # Merge
-    matrix = channel_kpis.merge(orders_summary, on="utm_source", how="left")
-
-    # Select and normalize
-    metric_cols = ['total_sessions', 'bounce_rate_pct', 'aov', 'conversion_rate_pct', 'gross_profit_pct', 'sessions_per_user']
-    matrix_indexed = matrix.set_index('utm_source')[metric_cols]
-
-    scaler = StandardScaler()
-    normalized = scaler.fit_transform(matrix_indexed)
-    normalized_df = pd.DataFrame(normalized, index=matrix_indexed.index, columns=matrix_indexed.columns)
 
-    # Melt for plotly heatmap
-    heatmap_df = normalized_df.reset_index().melt(id_vars='utm_source', var_name='KPI', value_name='Z-Score')
+@profiled
+def channel_kpi_heatmap_plotly(matrix):
+    """Channel vs KPI z-scores of `metrics.marketing.channel_kpi_matrix`."""
+    normalized_df = marketing.channel_kpi_zscores(matrix)
 
     fig = px.imshow(
         normalized_df.T,
@@ -230,27 +120,12 @@ def channel_kpi_heatmap_plotly(order_data, website_sessions, website_pageviews):
         xaxis_tickangle=45,
         height=500
     )
-
-    st.subheader("📊 Channel Matrix Heatmap (Plotly)")
-    st.plotly_chart(fig, use_container_width=True)
-
-    # Optional: show raw matrix below
-    with st.expander("📄 View Raw KPI Table"):
-        st.dataframe(matrix.round(2))
-
-    return matrix, normalized_df
+    return fig
 
 
+@profiled
 def line_column_avg_time_by_session_path(combined):
-    # Aggregate by path
-    summary = (
-        combined.groupby('pageview_url')
-        .agg(avg_duration=('session_duration_min', 'mean'),
-             session_count=('website_session_id', 'count'))
-        .sort_values(by='avg_duration', ascending=False)
-        .reset_index()
-        # .head(20) 
-    )
+    summary = marketing.avg_time_by_path(combined)
 
     # Plotly combo chart
     fig = go.Figure()
@@ -285,29 +160,10 @@ def line_column_avg_time_by_session_path(combined):
 
     return fig
 
-def bounce_rate_stacked_column(website_sessions, bounced):
-    
-#    pageviews_per_session = website_pageviews.groupby("website_session_id").size().reset_index(name="pageview_count")
-#   bounced = pageviews_per_session[pageviews_per_session["pageview_count"] == 1]["website_session_id"]
-
-    
-    # --- 1. Flag bounce sessions
-    website_sessions = website_sessions.copy()
-    website_sessions['is_bounce'] = website_sessions['website_session_id'].isin(bounced).astype(int)
-
-    # --- 2. Group by utm_source and utm_campaign
-    grouped = website_sessions.groupby(['utm_source', 'utm_campaign']).agg(
-        total_sessions=('website_session_id', 'nunique'),
-        bounce_sessions=('is_bounce', 'sum')
-    ).reset_index()
-
-    # --- 3. Calculate bounce rate
-    grouped["bounce_rate_pct"] = (grouped["bounce_sessions"] / grouped["total_sessions"]) * 100
-
-    # --- 4. Pivot for stacked chart
-    pivot_df = grouped.pivot(index='utm_source', columns='utm_campaign', values='bounce_rate_pct').fillna(0)
+@profiled
+def bounce_rate_stacked_column(website_sessions):
+    pivot_df = marketing.bounce_rate_pivot(website_sessions, 'utm_campaign')
 
-    # --- 5. Build Plotly Figure
     fig = go.Figure()
 
     for campaign in pivot_df.columns:
@@ -317,7 +173,6 @@ def bounce_rate_stacked_column(website_sessions, bounced):
             name=campaign
         ))
 
-    # --- 6. Layout
     fig.update_layout(
         barmode='stack',
         title='📊 Bounce Rate % by UTM Source and Campaign',
@@ -331,22 +186,9 @@ def bounce_rate_stacked_column(website_sessions, bounced):
 
     return fig
 
-def bounce_rate_stacked_column_by_content(website_sessions, bounced):
-    # --- Copy and flag bounce sessions ---
-    website_sessions = website_sessions.copy()
-    website_sessions['is_bounce'] = website_sessions['website_session_id'].isin(bounced).astype(int)
-
-    # --- Group by utm_source and utm_content ---
-    grouped = website_sessions.groupby(['utm_source', 'utm_content']).agg(
-        total_sessions=('website_session_id', 'nunique'),
-        bounce_sessions=('is_bounce', 'sum')
-    ).reset_index()
-
-    # --- Bounce Rate Calculation ---
-    grouped["bounce_rate_pct"] = (grouped["bounce_sessions"] / grouped["total_sessions"]) * 100
-
-    # --- Pivot to wide format ---
-    pivot_df = grouped.pivot(index='utm_source', columns='utm_content', values='bounce_rate_pct').fillna(0)
+@profiled
+def bounce_rate_stacked_column_by_content(website_sessions):
+    pivot_df = marketing.bounce_rate_pivot(website_sessions, 'utm_content')
 
     # --- Create Stacked Column Chart ---
     fig = go.Figure()
@@ -372,14 +214,10 @@ def bounce_rate_stacked_column_by_content(website_sessions, bounced):
     return fig
 
 # --- 1. Line Chart: Total Sessions by Year and Month ---
+@profiled
 def line_chart_total_sessions_over_time(website_sessions):
-    website_sessions = website_sessions.copy()
-    website_sessions['year_month'] = pd.to_datetime(website_sessions['session_created_at']).dt.to_period('M')
-    sessions_by_month = website_sessions.groupby('year_month')['website_session_id'].nunique().reset_index()
-    sessions_by_month['year_month'] = sessions_by_month['year_month'].astype(str)
-
     fig = px.line(
-        sessions_by_month,
+        marketing.sessions_over_time(website_sessions),
         x='year_month',
         y='website_session_id',
         title='📆 Total Sessions by Year and Month',
@@ -390,10 +228,10 @@ def line_chart_total_sessions_over_time(website_sessions):
     return fig
 
 # --- 2. Clustered Bar: Total Sessions by utm_source and device_type ---
+@profiled
 def clustered_bar_sessions_by_source_device(website_sessions):
-    grouped = website_sessions.groupby(['utm_source', 'device_type'])['website_session_id'].nunique().reset_index()
     fig = px.bar(
-        grouped,
+        marketing.sessions_by_source_and(website_sessions, 'device_type'),
         x='utm_source',
         y='website_session_id',
         color='device_type',
@@ -405,9 +243,9 @@ def clustered_bar_sessions_by_source_device(website_sessions):
     return fig
 
 # --- 3. Stacked Bar: Sessions by utm_source and utm_campaign ---
+@profiled
 def stacked_bar_sessions_by_source_campaign(website_sessions):
-    grouped = website_sessions.groupby(['utm_source', 'utm_campaign'])['website_session_id'].nunique().reset_index()
-    pivot_df = grouped.pivot(index='utm_source', columns='utm_campaign', values='website_session_id').fillna(0)
+    pivot_df = marketing.sessions_pivot(website_sessions, 'utm_campaign')
 
     fig = go.Figure()
     for campaign in pivot_df.columns:
@@ -427,9 +265,9 @@ def stacked_bar_sessions_by_source_campaign(website_sessions):
     return fig
 
 # --- 4. Stacked Bar: Sessions by utm_source and utm_content ---
+@profiled
 def stacked_bar_sessions_by_source_content(website_sessions):
-    grouped = website_sessions.groupby(['utm_source', 'utm_content'])['website_session_id'].nunique().reset_index()
-    pivot_df = grouped.pivot(index='utm_source', columns='utm_content', values='website_session_id').fillna(0)
+    pivot_df = marketing.sessions_pivot(website_sessions, 'utm_content')
 
     fig = go.Figure()
     for content in pivot_df.columns:
@@ -449,16 +287,10 @@ def stacked_bar_sessions_by_source_content(website_sessions):
     return fig
 
 # === 1. Line Chart: Total Orders by Year and Month ===
+@profiled
 def line_chart_total_orders_over_time(order_data):
-    order_data['year_month'] = pd.to_datetime(order_data['order_date']).dt.to_period('M').astype(str)
-    orders_by_month = (
-        order_data.groupby('year_month')['order_id']
-        .nunique()
-        .reset_index(name='total_orders')
-    )
-
     fig = px.line(
-        orders_by_month,
+        marketing.orders_over_time(order_data),
         x='year_month',
         y='total_orders',
         title='📈 Total Orders by Year and Month',
@@ -468,15 +300,10 @@ def line_chart_total_orders_over_time(order_data):
     return fig
 
 # === 2. Stacked Bar Chart: Conversion Rate by utm_source + utm_campaign ===
+@profiled
 def stacked_bar_conversion_by_source_campaign(order_data, website_sessions):
-    total_sessions = website_sessions.groupby(['utm_source', 'utm_campaign'])['website_session_id'].nunique().reset_index(name='total_sessions')
-    total_orders = order_data.groupby(['utm_source', 'utm_campaign'])['order_id'].nunique().reset_index(name='total_orders')
-
-    df = pd.merge(total_sessions, total_orders, on=['utm_source', 'utm_campaign'], how='left').fillna(0)
-    df['conversion_rate_pct'] = (df['total_orders'] / df['total_sessions']) * 100
-
     fig = px.bar(
-        df,
+        marketing.conversion_by_source_and(order_data, website_sessions, 'utm_campaign'),
         x='utm_source',
         y='conversion_rate_pct',
         color='utm_campaign',
@@ -487,15 +314,10 @@ def stacked_bar_conversion_by_source_campaign(order_data, website_sessions):
     return fig
 
 # === 3. Stacked Bar Chart: Conversion Rate by utm_source + utm_content ===
+@profiled
 def stacked_bar_conversion_by_source_content(order_data, website_sessions):
-    total_sessions = website_sessions.groupby(['utm_source', 'utm_content'])['website_session_id'].nunique().reset_index(name='total_sessions')
-    total_orders = order_data.groupby(['utm_source', 'utm_content'])['order_id'].nunique().reset_index(name='total_orders')
-
-    df = pd.merge(total_sessions, total_orders, on=['utm_source', 'utm_content'], how='left').fillna(0)
-    df['conversion_rate_pct'] = (df['total_orders'] / df['total_sessions']) * 100
-
     fig = px.bar(
-        df,
+        marketing.conversion_by_source_and(order_data, website_sessions, 'utm_content'),
         x='utm_source',
         y='conversion_rate_pct',
         color='utm_content',
@@ -506,28 +328,13 @@ def stacked_bar_conversion_by_source_content(order_data, website_sessions):
     return fig
 
 # === 4. Column Chart – Total Orders by session_path ===
+@profiled
 def column_chart_orders_by_session_path(order_data, session_path_data, top_n=20):
     """
     Column chart: Total Orders by session path.
     """
-    # Merge order data with session path data
-    merged = order_data.merge(session_path_data, on="website_session_id", how="inner")
-
-    # Clean/shorten long paths
-    merged['path_short'] = merged['pageview_url'].apply(lambda x: x[:60] + '...' if len(x) > 60 else x)
-
-    # Count total orders by path
-    orders_by_path = (
-        merged.groupby('path_short')['order_id']
-        .nunique()
-        .reset_index(name='total_orders')
-        .sort_values(by='total_orders', ascending=False)
-        .head(top_n)
-    )
-
-    # Plot
     fig = px.bar(
-        orders_by_path,
+        marketing.orders_by_path(order_data, session_path_data, top_n),
         x='path_short',
         y='total_orders',
         text='total_orders',
@@ -545,15 +352,58 @@ def column_chart_orders_by_session_path(order_data, session_path_data, top_n=20)
 
     return fig
 
+# === 5. Path Explorer – next pages after the chosen prefix ===
+@profiled
+def next_page_bar(next_steps, after):
+    """`next_steps` as from PathTrie.children, `after` is the label of the prefix ('' at the start)."""
+    fig = px.bar(
+        next_steps,
+        x='page',
+        y='sessions',
+        text='sessions',
+        hover_data=['conversion_rate_pct', 'avg_duration_min'],
+        title='🧭 Next Page After: ' + (after or 'Session Start'),
+        labels={'page': 'Next Page', 'sessions': 'Sessions'}
+    )
+    fig.update_traces(marker_color='teal', textposition='outside')
+    fig.update_layout(xaxis_tickangle=45, template='plotly_white')
+    return fig
+
+# === 6. Bar Chart – Attributed Revenue per Channel ===
+@profiled
+def attribution_bar(attributed, channel, model_label):
+    fig = px.bar(
+        attributed,
+        x=channel,
+        y='attributed_revenue',
+        text='attributed_revenue',
+        hover_data=['attributed_orders'],
+        title=f'🧮 Attributed Revenue by {channel} – {model_label}',
+        labels={channel: channel, 'attributed_revenue': 'Attributed Revenue (USD)'}
+    )
+    fig.update_traces(texttemplate='$%{text:,.0f}', textposition='outside')
+    fig.update_layout(xaxis_tickangle=45, template='plotly_white')
+    return fig
+
+# === 7. Grouped Bar – Attributed Revenue per Channel across Models ===
+@profiled
+def attribution_model_comparison(comparison, channel):
+    fig = px.bar(
+        comparison,
+        x=channel,
+        y='attributed_revenue',
+        color='model',
+        barmode='group',
+        title='⚖️ Attribution Model Comparison',
+        labels={'attributed_revenue': 'Attributed Revenue (USD)', 'model': 'Model'}
+    )
+    fig.update_layout(xaxis_tickangle=45, template='plotly_white')
+    return fig
+
 # 1. 📊 Gross Revenue & Orders Over Time by Product
+@profiled
 def line_column_revenue_orders_by_product(order_data):
-    df = order_data.copy()
-    df['year_month'] = pd.to_datetime(df['order_date']).dt.to_period('M').astype(str)
-
-    grouped = df.groupby(['year_month', 'product_name']).agg(
-        gross_revenue=('price_usd', 'sum'),
-        total_orders=('order_id', 'nunique')
-    ).reset_index()
+    grouped = marketing.revenue_orders_by_product(order_data)
 
     fig = px.bar(
         grouped, x='year_month', y='gross_revenue', color='product_name',
@@ -573,10 +423,10 @@ def line_column_revenue_orders_by_product(order_data):
     return fig
 
 # 2. 🍩 Donut Chart – Total Units Sold
+@profiled
 def donut_units_sold_by_product(order_data):
-    df = order_data.groupby('product_name')['items_purchased'].sum().reset_index(name='units_sold')
     fig = px.pie(
-        df,
+        marketing.units_sold_by_product(order_data),
         values='units_sold',
         names='product_name',
         hole=0.4,
@@ -636,12 +486,10 @@ def matrix_cross_selling(order_data):
 '''
 
 # 4. 📉 Total Refunds by Product
+@profiled
 def bar_refunds_by_product(order_data):
-    df = order_data[order_data['refund_amount_usd'].notna()]
-    df = df.groupby('product_name')['refund_amount_usd'].sum().reset_index()
-
     fig = px.bar(
-        df,
+        marketing.refunds_by_product(order_data),
         x='product_name',
         y='refund_amount_usd',
         text='refund_amount_usd',
@@ -0,0 +1,79 @@
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+# One memo per script thread; main() starts a fresh one at the top of every rerun.
+# Chart workers run against the memo of the rerun that submitted them, see bound()
+_local = threading.local()
+
+
+class RerunMemo:
+    """Aggregations computed during one rerun, keyed by (frame, group keys, column, func).
+
+    Frames are keyed by identity. Each entry keeps its frame alive, so the id
+    cannot be reused by another frame while the memo exists, and frames are
+    never modified in place under copy-on-write. Threads sharing the memo
+    build each key once; the others wait for that build.
+    """
+
+    def __init__(self):
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, frame, build):
+        with self._lock:
+            entry = self.entries.get(key)
+            owner = entry is None
+            if owner:
+                self.misses += 1
+                entry = self.entries[key] = (frame, Future())
+            else:
+                self.hits += 1
+        if owner:
+            try:
+                entry[1].set_result(build())
+            except BaseException as e:
+                entry[1].set_exception(e)
+        return entry[1].result()
+
+
+def begin_rerun():
+    _local.memo = RerunMemo()
+    return _local.memo
+
+
+def current():
+    memo = getattr(_local, "memo", None)
+    return memo if memo is not None else begin_rerun()
+
+
+def grouped(df, by, column, func):
+    """`df.groupby(by)[column].agg(func)` as a Series, computed once per rerun for the same frame."""
+    by = [by] if isinstance(by, str) else list(by)
+    key = (id(df), tuple(by), column, func)
+    result = current().get(key, df, lambda: df.groupby(by, observed=True)[column].agg(func))
+    # Callers get their own shallow copy, renaming or resetting it leaves the memo intact
+    return result.copy(deep=False)
+
+
+@contextmanager
+def bound(rerun_memo):
+    """Run the block against `rerun_memo`, the memo of the rerun a chart worker computes for."""
+    previous = getattr(_local, "memo", None)
+    _local.memo = rerun_memo
+    try:
+        yield rerun_memo
+    finally:
+        _local.memo = previous
+
+
+def isolated(fn, *args, **kwargs):
+    """`fn(*args, **kwargs)` with a memo of its own, dropped afterwards.
+
+    For worker processes: nothing there is shared with the rerun, and a memo
+    left behind would keep the task's frames alive until the next task.
+    """
+    with bound(RerunMemo()):
+        return fn(*args, **kwargs)
@@ -0,0 +1,68 @@
+from analytics.order_sequence import order_flag_counts
+from analytics.planner import Query
+from analytics.session_features import join_features
+from metrics.trends import by_period, in_funnel_order, revenue_vs_cogs
+
+
+def headline(cube, orders, refunds, sessions):
+    """KPI numbers of the CEO dashboard.
+
+    `cube` is the order cube sliced to the selection and `orders` the matching
+    rows; refunds and sessions are not filtered by the selection.
+    """
+    gross_rev = cube.total("price_usd")
+    cogs = cube.total("cogs_usd")
+    refund_amt = refunds["refund_amount_usd"].sum()
+    gross_profit = gross_rev - cogs
+
+    total_orders = cube.total("order_id")
+    total_sessions = sessions["website_session_id"].nunique()
+
+    repeat_sessions = orders[orders["is_repeat_session"] == 1]["website_session_id"].nunique()
+    bounce_sessions = sessions[sessions["is_bounce"] == 1]["website_session_id"].nunique()
+
+    return {
+        "gross_rev": gross_rev,
+        "net_rev": gross_rev - refund_amt,
+        "gross_profit": gross_profit,
+        "net_profit": gross_profit - refund_amt,
+        "total_orders": total_orders,
+        "total_sessions": total_sessions,
+        "total_customers": cube.total("user_id"),
+        "repeat_session_rate": (repeat_sessions / total_sessions) * 100 if total_sessions else 0,
+        "bounce_rate": (bounce_sessions / total_sessions) * 100 if total_sessions else 0,
+        "conversion_rate": (total_orders / total_sessions) * 100 if total_sessions else 0,
+        "refunds_total": refunds["order_item_refund_id"].nunique(),
+        "refund_amount": refund_amt,
+        "avg_order_value": gross_rev / total_orders if total_orders else 0,
+    }
+
+
+def business_overview(cube, orders):
+    return {
+        "revenue_by_source": cube.rollup(["utm_source"], sums=["price_usd"]),
+        "users_by_device": cube.rollup(["device_type"], distinct=["user_id"]),
+        "orders_by_type": order_flag_counts(orders),
+        "sessions_by_source": cube.rollup(["utm_source"], distinct=["website_session_id"]),
+    }
+
+
+def revenue_and_profit(cube):
+    return {
+        "revenue_by_month": by_period(cube, "year_month", sums=["price_usd"]),
+        "revenue_vs_cogs": revenue_vs_cogs(cube),
+        "revenue_by_quarter": by_period(cube, "year_quarter", sums=["price_usd"]),
+    }
+
+
+def engagement_and_refunds(plan, sessions, features):
+    """Bounces per source, refunds per product and the user funnel; `plan` is a Planner over the CEO tables."""
+    bounced = join_features(sessions, features, ["is_bounce"])
+    bounced = bounced[bounced["is_bounce"]]
+    refund_prod = plan.run(Query("refunds", by=["product_name"], aggs={"refund_count": ("order_item_id", "size")}))
+    stage_counts = plan.run(Query("sessions", by=["funnel_stage"], aggs={"user_id": ("user_id", "nunique")}))
+    return {
+        "bounces_by_source": bounced.groupby("utm_source", observed=True)["website_session_id"].nunique().reset_index(),
+        "refunds_by_product": refund_prod.sort_values("refund_count", ascending=False, kind="stable"),
+        "users_by_stage": in_funnel_order(stage_counts),
+    }
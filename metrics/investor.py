@@ -0,0 +1,41 @@
+from analytics.order_sequence import order_flag_counts
+from analytics.session_features import join_features
+from metrics.trends import by_period, revenue_vs_cogs, users_by_stage
+
+
+def business_growth(ocube, scube, orders):
+    return {
+        "total_orders": ocube.total("order_id"),
+        "unique_customers": ocube.total("user_id"),
+        "active_months": ocube.cells["year_month"].nunique(),
+        "orders_by_month": by_period(ocube, "year_month", distinct=["order_id"]),
+        "orders_by_type": order_flag_counts(orders),
+        "users_by_device": scube.rollup(["device_type"], distinct=["user_id"]),
+        "orders_by_source": ocube.rollup(["utm_source"], distinct=["order_id"]),
+    }
+
+
+def revenue_insights(ocube, orders):
+    gross_revenue = ocube.total("price_usd")
+    cogs = ocube.total("cogs_usd")
+    return {
+        "gross_revenue": gross_revenue,
+        "net_revenue": gross_revenue - cogs,
+        "cogs": cogs,
+        # Mean over customers of each customer's mean order value
+        "avg_order_value": orders.groupby("user_id")["price_usd"].mean().mean(),
+        "revenue_by_month": by_period(ocube, "year_month", sums=["price_usd"]),
+        "revenue_by_quarter": by_period(ocube, "year_quarter", sums=["price_usd"]),
+        "revenue_vs_cogs": revenue_vs_cogs(ocube),
+    }
+
+
+def traffic_and_engagement(ocube, scube, sessions, features):
+    return {
+        "total_sessions": scube.total("website_session_id"),
+        "bounce_sessions": int(join_features(sessions, features, ["is_bounce"])["is_bounce"].sum()),
+        "conversion_rate": (ocube.total("user_id") / scube.total("user_id")) * 100,
+        "sessions_by_source": scube.rollup(["utm_source"], distinct=["website_session_id"]),
+        "users_by_stage": users_by_stage(sessions),
+        "sessions_by_month": by_period(scube, "year_month", distinct=["website_session_id"]),
+    }
@@ -0,0 +1,187 @@
+import numpy as np
+import pandas as pd
+
+import memo
+from analytics.paths import short_labels
+from schema import fill_label
+
+# Columns of the channel matrix that are compared across sources
+CHANNEL_KPIS = ['total_sessions', 'bounce_rate_pct', 'aov', 'conversion_rate_pct', 'gross_profit_pct',
+                'sessions_per_user']
+
+
+def zscores(frame):
+    """Each column standardized to mean 0 and population std 1, like sklearn's StandardScaler.
+
+    Missing values are skipped by the mean and std and stay missing; a
+    constant column comes out as zeros.
+    """
+    values = frame.to_numpy(dtype=float)
+    counts = np.sum(~np.isnan(values), axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.nansum(values, axis=0) / counts
+        var = np.nansum((values - mean) ** 2, axis=0) / counts
+    # Same tolerance as StandardScaler: variance within rounding noise of the mean counts as constant
+    eps = np.finfo(float).eps
+    constant = var <= counts * eps * var + (counts * mean * eps) ** 2
+    scale = np.where(constant | np.isnan(var), 1.0, np.sqrt(var))
+    return pd.DataFrame((values - mean) / scale, index=frame.index, columns=frame.columns)
+
+
+def conversion_by_month(order_data, website_sessions):
+    sessions_by_month = memo.grouped(website_sessions, 'year_month', 'website_session_id', 'nunique').reset_index(name='total_sessions')
+    converted_by_month = memo.grouped(order_data, 'year_month', 'website_session_id', 'nunique').reset_index(name='converted_sessions')
+
+    df = pd.merge(sessions_by_month, converted_by_month, on='year_month', how='left').fillna(0)
+    df['conversion_rate_pct'] = (df['converted_sessions'] / df['total_sessions']) * 100
+    df['year_month'] = df['year_month'].astype(str)
+    return df
+
+
+def conversion_by_month_and_product(order_data, website_sessions):
+    sessions_by_month = memo.grouped(website_sessions, 'year_month', 'website_session_id', 'nunique').reset_index(name='total_sessions')
+    converted = memo.grouped(order_data, ['year_month', 'product_name'], 'website_session_id', 'nunique').reset_index(name='converted_sessions')
+
+    df = converted.merge(sessions_by_month, on='year_month', how='left')
+    df['conversion_rate_pct'] = (df['converted_sessions'] / df['total_sessions']) * 100
+    df['year_month'] = df['year_month'].astype(str)
+    return df
+
+
+def sessions_by_source(website_sessions):
+    """Session count per utm_source, missing sources as 'Unknown' and the literal 'NULL' left out."""
+    data = fill_label(website_sessions['utm_source'], 'Unknown', missing=())
+    data = data[data.str.upper() != 'NULL']
+    counts = data.value_counts().reset_index()
+    counts.columns = ['utm_source', 'sessions']
+    return counts
+
+
+def revenue_by_source(order_data):
+    df = order_data[order_data['utm_source'].notna()]
+    df = df[df['utm_source'].str.upper() != 'NULL']
+    revenue = df.groupby('utm_source')['price_usd'].sum().reset_index()
+    return revenue.sort_values(by='price_usd', ascending=False)
+
+
+def channel_kpi_matrix(order_data, website_sessions):
+    """Session and order KPIs per utm_source; `website_sessions` must carry `is_bounce`."""
+    session_info = website_sessions.assign(is_bounce=website_sessions['is_bounce'].astype(int))
+    channel_kpis = session_info.groupby('utm_source').agg(
+        total_sessions=('website_session_id', 'nunique'),
+        total_users=('user_id', 'nunique'),
+        bounce_sessions=('is_bounce', 'sum')
+    ).reset_index()
+    channel_kpis['bounce_rate_pct'] = (channel_kpis['bounce_sessions'] / channel_kpis['total_sessions']) * 100
+    channel_kpis['sessions_per_user'] = channel_kpis['total_sessions'] / channel_kpis['total_users']
+
+    orders_summary = order_data.groupby('utm_source').agg(
+        orders=('order_id', 'nunique'),
+        revenue=('price_usd', 'sum'),
+        cogs=('cogs_usd', 'sum'),
+        buyers=('user_id', 'nunique')
+    ).reset_index()
+    orders_summary['aov'] = orders_summary['revenue'] / orders_summary['orders']
+    orders_summary['gross_profit_pct'] = ((orders_summary['revenue'] - orders_summary['cogs']) / orders_summary['revenue']) * 100
+
+    matrix = channel_kpis.merge(orders_summary, on='utm_source', how='left')
+    # After the merge, so orders and sessions line up by source rather than by position
+    matrix['conversion_rate_pct'] = (matrix['orders'] / matrix['total_sessions']) * 100
+    return matrix
+
+
+def channel_kpi_zscores(matrix):
+    """The CHANNEL_KPIS of `channel_kpi_matrix`, indexed by source and standardized per KPI."""
+    return zscores(matrix.set_index('utm_source')[CHANNEL_KPIS])
+
+
+def avg_time_by_path(combined):
+    # Aggregate by interned path id, the path text is looked up once per path
+    summary = (
+        combined.groupby('path_id')
+        .agg(avg_duration=('session_duration_min', 'mean'),
+             session_count=('website_session_id', 'count'))
+        .sort_values(by='avg_duration', ascending=False)
+        .reset_index()
+    )
+    summary['pageview_url'] = combined['pageview_url'].cat.categories[summary['path_id']]
+    return summary
+
+
+def bounce_rate_pivot(website_sessions, column):
+    """Bounce rate % per utm_source (rows) and `column` (columns)."""
+    website_sessions = website_sessions.assign(is_bounce=website_sessions['is_bounce'].astype(int))
+    grouped = website_sessions.groupby(['utm_source', column]).agg(
+        total_sessions=('website_session_id', 'nunique'),
+        bounce_sessions=('is_bounce', 'sum')
+    ).reset_index()
+    grouped['bounce_rate_pct'] = (grouped['bounce_sessions'] / grouped['total_sessions']) * 100
+    return grouped.pivot(index='utm_source', columns=column, values='bounce_rate_pct').fillna(0)
+
+
+def sessions_over_time(website_sessions):
+    sessions_by_month = memo.grouped(website_sessions, 'year_month', 'website_session_id', 'nunique').reset_index()
+    sessions_by_month['year_month'] = sessions_by_month['year_month'].astype(str)
+    return sessions_by_month
+
+
+def sessions_by_source_and(website_sessions, column):
+    """Distinct sessions per utm_source and `column`, long format."""
+    return memo.grouped(website_sessions, ['utm_source', column], 'website_session_id', 'nunique').reset_index()
+
+
+def sessions_pivot(website_sessions, column):
+    """Distinct sessions per utm_source (rows) and `column` (columns)."""
+    grouped = sessions_by_source_and(website_sessions, column)
+    return grouped.pivot(index='utm_source', columns=column, values='website_session_id').fillna(0)
+
+
+def orders_over_time(order_data):
+    orders_by_month = memo.grouped(order_data, 'year_month', 'order_id', 'nunique').reset_index(name='total_orders')
+    orders_by_month['year_month'] = orders_by_month['year_month'].astype(str)
+    return orders_by_month
+
+
+def conversion_by_source_and(order_data, website_sessions, column):
+    """Conversion rate % per utm_source and `column`."""
+    total_sessions = memo.grouped(website_sessions, ['utm_source', column], 'website_session_id', 'nunique').reset_index(name='total_sessions')
+    total_orders = memo.grouped(order_data, ['utm_source', column], 'order_id', 'nunique').reset_index(name='total_orders')
+
+    df = pd.merge(total_sessions, total_orders, on=['utm_source', column], how='left').fillna(0)
+    df['conversion_rate_pct'] = (df['total_orders'] / df['total_sessions']) * 100
+    return df
+
+
+def orders_by_path(order_data, session_path_data, top_n=20):
+    """Distinct orders per shortened session path, the `top_n` largest."""
+    merged = order_data.merge(session_path_data, on='website_session_id', how='inner')
+
+    # Clean/shorten long paths: once per distinct path, then looked up by path id
+    short = short_labels(session_path_data['pageview_url'].cat.categories)
+    merged['path_short'] = short[merged['path_id'].to_numpy()]
+
+    return (
+        merged.groupby('path_short')['order_id']
+        .nunique()
+        .reset_index(name='total_orders')
+        .sort_values(by='total_orders', ascending=False)
+        .head(top_n)
+    )
+
+
+def revenue_orders_by_product(order_data):
+    grouped = order_data.groupby(['year_month', 'product_name']).agg(
+        gross_revenue=('price_usd', 'sum'),
+        total_orders=('order_id', 'nunique')
+    ).reset_index()
+    grouped['year_month'] = grouped['year_month'].astype(str)
+    return grouped
+
+
+def units_sold_by_product(order_data):
+    return order_data.groupby('product_name')['items_purchased'].sum().reset_index(name='units_sold')
+
+
+def refunds_by_product(order_data):
+    df = order_data[order_data['refund_amount_usd'].notna()]
+    return df.groupby('product_name')['refund_amount_usd'].sum().reset_index()
@@ -0,0 +1,30 @@
+import pandas as pd
+
+# Funnel stages in the order every dashboard draws them, top to bottom
+FUNNEL_STAGES = ["Landing Bounce", "Dropped at Product", "Dropped at Checkout", "Dropped at Cart",
+                 "Converted Session"]
+
+
+def by_period(cube, period, sums=(), distinct=()):
+    """`cube.rollup` over a period column (year_month, year_quarter), periods as text for the chart axis."""
+    frame = cube.rollup([period], sums=sums, distinct=distinct)
+    frame[period] = frame[period].astype(str)
+    return frame
+
+
+def revenue_vs_cogs(cube):
+    """Monthly revenue and COGS in long format, one `Metric` per line."""
+    rev_cogs = by_period(cube, "year_month", sums=["price_usd", "cogs_usd"])
+    return rev_cogs.melt(id_vars="year_month", value_vars=["price_usd", "cogs_usd"],
+                         var_name="Metric", value_name="Amount")
+
+
+def in_funnel_order(stage_counts):
+    """Rows of a per-funnel_stage frame sorted along FUNNEL_STAGES."""
+    stage_counts = stage_counts.assign(
+        funnel_stage=pd.Categorical(stage_counts["funnel_stage"], categories=FUNNEL_STAGES, ordered=True))
+    return stage_counts.sort_values("funnel_stage")
+
+
+def users_by_stage(sessions):
+    return in_funnel_order(sessions.groupby("funnel_stage", observed=True)["user_id"].nunique().reset_index())
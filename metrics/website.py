@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+
+import memo
+from analytics.session_index import KEY, order_index, pageview_index, unique_sorted
+from dataset import requires
+from metrics.trends import users_by_stage
+from schema import fill_label
+
+# Sidebar filters of the Website Manager page, calendar columns come from add_calendar
+FILTER_COLUMNS = {"Year": "Year", "Month": "Month", "Day": "Day", "Device Type": "device_type", "Source": "utm_source"}
+
+
+def add_calendar(sessions):
+    """Sessions with missing sources as 'Others' and Year/Month/Day/Quarter of the session start."""
+    # Derived columns go on new frames, the shared ones are never written to
+    created = sessions['session_created_at'].dt
+    return sessions.assign(
+        utm_source=fill_label(sessions['utm_source'], 'Others'),
+        Year=created.year,
+        Month=created.month_name(),
+        Day=created.day_name(),
+        Quarter=created.quarter,
+    )
+
+
+def filter_options(sessions):
+    """Choices of each sidebar filter, "All" first."""
+    return {
+        "Year": ["All"] + sorted(sessions['Year'].dropna().unique().tolist()),
+        "Month": ["All"] + sorted(sessions['Month'].dropna().unique().tolist()),
+        "Day": ["All"] + sorted(sessions['Day'].dropna().unique().tolist()),
+        "Device Type": ["All"] + sessions['device_type'].dropna().unique().tolist(),
+        "Source": ["All"] + sessions['utm_source'].dropna().unique().tolist(),
+    }
+
+
+def filter_sessions(sessions, selection):
+    """Sessions matching every filter of `selection` (filter name -> value) that is not "All"."""
+    for name, value in selection.items():
+        if value != "All":
+            sessions = sessions[sessions[FILTER_COLUMNS[name]] == value]
+    return sessions
+
+
+def _sorted_ids(sessions):
+    return unique_sorted(sessions[KEY].dropna().to_numpy(dtype=np.int64))
+
+
+@requires(pageviews=["website_pageview_id", "created_at", KEY, "pageview_url"])
+def session_pageviews(dataset, sessions):
+    """Pageviews of `sessions`, sliced from the session-sorted pageview index."""
+    return pageview_index(dataset).take(_sorted_ids(sessions))
+
+
+@requires(orders=["order_id", KEY, "utm_source"])
+def session_orders(dataset, sessions):
+    """Orders of `sessions` with missing sources as 'Others', sliced from the session-sorted order index."""
+    orders = order_index(dataset).take(_sorted_ids(sessions))
+    return orders.assign(utm_source=fill_label(orders['utm_source'], 'Others'))
+
+
+def website_performance(sessions):
+    bounce_by_q = sessions.groupby('Quarter')['is_bounce'].mean().reset_index()
+    bounce_by_q['bounce'] = bounce_by_q['is_bounce'] * 100
+
+    device_duration = sessions.groupby('device_type')['session_duration_MIN'].mean().reset_index()
+    device_duration['session_duration_MIN'] = device_duration['session_duration_MIN'].round(1)
+
+    user_visit = memo.grouped(sessions, 'user_id', 'website_session_id', 'nunique')
+
+    visitor_count = memo.grouped(sessions, ['Quarter', 'is_repeat_session'], 'user_id', 'nunique').reset_index(name='visitor_count')
+    visitor_count['visitor_type'] = visitor_count['is_repeat_session'].map({0: 'Unique Visitor', 1: 'Returning Visitor'})
+
+    return {
+        "total_users": sessions['user_id'].nunique(),
+        "avg_duration": sessions['session_duration_MIN'].mean(),
+        # % of sessions with a single pageview
+        "bounce_rate": (sessions['total_pageviews'] == 1).mean() * 100,
+        "repeat_visitors": user_visit[user_visit > 1].size,
+        "unique_visitors": user_visit[user_visit == 1].size,
+        "bounce_by_quarter": bounce_by_q,
+        "duration_by_device": device_duration,
+        "visitors_by_quarter": visitor_count,
+        "sessions_by_quarter_source": memo.grouped(sessions, ['Quarter', 'utm_source'], 'website_session_id', 'nunique').reset_index(name='session_count'),
+    }
+
+
+def page_views(pageviews, sessions):
+    """Pageview KPIs and charts of the filtered sessions; `pageviews` are the pageviews of those sessions."""
+    first_page_visit = (pageviews.sort_values(by=['website_session_id', 'created_at'])
+                        .groupby('website_session_id').first().reset_index())
+    top_first_page = first_page_visit['pageview_url'].value_counts().reset_index()
+    top_first_page.columns = ['pageview_url', 'visit_count']
+
+    merged_data = pageviews.merge(sessions[['website_session_id', 'is_bounce']], on='website_session_id', how='left')
+    bounce_by_page = merged_data.groupby('pageview_url')['is_bounce'].mean().reset_index()
+    bounce_by_page['is_bounce'] = bounce_by_page['is_bounce'] * 100
+    bounce_by_page = bounce_by_page[bounce_by_page['is_bounce'] != 0]
+
+    bounce_by_source = round(sessions.groupby('utm_source')['is_bounce'].mean(), 4).reset_index()
+    bounce_by_source['is_bounce'] = round(bounce_by_source['is_bounce'] * 100, 2)
+    bounce_by_source = bounce_by_source[bounce_by_source['is_bounce'] != 0]
+
+    total_sessions_by_page = memo.grouped(pageviews, 'pageview_url', 'website_session_id', 'nunique').reset_index()
+    total_sessions_by_page.columns = ['pageview_url', 'total_sessions']
+
+    return {
+        "total_page_views": pageviews['website_pageview_id'].nunique(),
+        "unique_page_views": pageviews['website_session_id'].nunique(),
+        # % of sessions with an order
+        "conversion_rate": (sessions['orders_in_session'] >= 1).mean() * 100,
+        "avg_page_views": sessions['total_pageviews'].mean(),
+        "first_pages": top_first_page.sort_values('visit_count', ascending=True),
+        "bounce_by_page": bounce_by_page.sort_values('is_bounce', ascending=True),
+        "bounce_by_source": bounce_by_source,
+        "sessions_by_page": total_sessions_by_page.sort_values('total_sessions', ascending=True),
+    }
+
+
+def traffic(sessions, orders):
+    """Sessions and orders per source; `orders` are the orders of the filtered sessions."""
+    # One session and one order count per source feeds the KPIs and the charts
+    sessions_by_source = memo.grouped(sessions, 'utm_source', 'website_session_id', 'nunique')
+    orders_by_source = memo.grouped(orders, 'utm_source', 'order_id', 'nunique')
+    compare = pd.DataFrame({'Sessions': sessions_by_source, 'Orders': orders_by_source}).reset_index().rename(columns={'index': 'utm_source'})
+    return {
+        "total_sessions": sessions['website_session_id'].nunique(),
+        "sessions_by_source": sessions_by_source,
+        "orders_by_source": orders_by_source,
+        "sessions_by_source_device": memo.grouped(sessions, ['utm_source', 'device_type'], 'website_session_id', 'nunique').reset_index(),
+        "conversion_by_source": (orders_by_source / sessions_by_source).reset_index(name='conversion_rate'),
+        "sessions_vs_orders": compare.sort_values(by='Sessions', ascending=False),
+        "users_by_stage": users_by_stage(sessions),
+    }
@@ -0,0 +1,185 @@
+import csv
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+import pandas as pd
+import streamlit as st
+
+# Set DASHBOARD_PROFILE=0 to turn timing off; DASHBOARD_PROFILE_MEMORY=1 also
+# traces allocations, which slows every allocation down while it is on
+PROFILE = os.environ.get("DASHBOARD_PROFILE", "1") != "0"
+PROFILE_MEMORY = os.environ.get("DASHBOARD_PROFILE_MEMORY", "0") == "1"
+# Off unless set: records are also appended to this file (JSON lines, or CSV for a .csv path),
+# once per rerun by flush_profile_log. Past DASHBOARD_PROFILE_LOG_MAX_MB it is moved to <path>.1
+PROFILE_LOG = os.environ.get("DASHBOARD_PROFILE_LOG", "")
+PROFILE_LOG_MAX_BYTES = int(float(os.environ.get("DASHBOARD_PROFILE_LOG_MAX_MB", "10")) * 1024 * 1024)
+PROFILE_FIELDS = ["time", "label", "wall_ms", "rows_in", "rows_out", "peak_kb", "thread"]
+
+RECORDS = deque(maxlen=20_000)
+# Records not yet written to PROFILE_LOG
+_pending = deque(maxlen=20_000)
+_lock = threading.Lock()
+_log_lock = threading.Lock()
+_local = threading.local()
+
+
+def rows(value):
+    """Row count of a frame/series (or a list/tuple/dict of them), points of a plotly figure,
+    None for anything else."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return len(value)
+    if hasattr(value, "to_plotly_json"):
+        return sum(len(trace.x) for trace in value.data if getattr(trace, "x", None) is not None)
+    if isinstance(value, dict):
+        value = list(value.values())
+    if isinstance(value, (list, tuple)):
+        counts = [n for n in map(rows, value) if n is not None]
+        return sum(counts) if counts else None
+    return None
+
+
+def _record(record):
+    # Hot path, also hit from chart workers: memory only, the file is written by flush_profile_log
+    with _lock:
+        RECORDS.append(record)
+        if PROFILE_LOG:
+            _pending.append(record)
+
+
+def flush_profile_log():
+    """Append the records gathered since the last flush to PROFILE_LOG; main() calls it once per rerun."""
+    if not PROFILE_LOG:
+        return
+    with _lock:
+        records = list(_pending)
+        _pending.clear()
+    if not records:
+        return
+    with _log_lock:
+        os.makedirs(os.path.dirname(PROFILE_LOG) or ".", exist_ok=True)
+        if os.path.exists(PROFILE_LOG) and os.path.getsize(PROFILE_LOG) > PROFILE_LOG_MAX_BYTES:
+            os.replace(PROFILE_LOG, PROFILE_LOG + ".1")
+        if PROFILE_LOG.endswith(".csv"):
+            new = not os.path.exists(PROFILE_LOG)
+            with open(PROFILE_LOG, "a", newline="") as f:
+                writer = csv.DictWriter(f, PROFILE_FIELDS)
+                if new:
+                    writer.writeheader()
+                writer.writerows(records)
+        else:
+            with open(PROFILE_LOG, "a") as f:
+                f.writelines(json.dumps(record) + "\n" for record in records)
+
+
+def _memory_stack():
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+@contextmanager
+def profile(label, rows_in=None):
+    """Time the block; set `record["rows_out"]` inside it to log the output size.
+
+    With PROFILE_MEMORY the peak is the highest traced allocation above the
+    level at entry. The tracer is process wide, so allocations of other
+    threads running at the same time are included.
+    """
+    record = {"label": label, "rows_in": rows_in, "rows_out": None, "peak_kb": None}
+    if not PROFILE:
+        yield record
+        return
+    stack = _memory_stack() if PROFILE_MEMORY else None
+    if stack is not None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        current, peak = tracemalloc.get_traced_memory()
+        if stack:
+            # Resetting the peak below must not lose what the enclosing block saw so far
+            stack[-1][1] = max(stack[-1][1], peak)
+        tracemalloc.reset_peak()
+        stack.append([current, current])
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record["wall_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        if stack is not None:
+            base, peak = stack.pop()
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            if stack:
+                stack[-1][1] = max(stack[-1][1], peak)
+            record["peak_kb"] = round((peak - base) / 1024, 1)
+        record["time"] = time.time()
+        record["thread"] = threading.current_thread().name
+        _record({field: record.get(field) for field in PROFILE_FIELDS})
+
+
+def profiled(fn=None, *, label=None):
+    """Decorator form of `profile`: rows in are counted over the arguments, rows out over the result."""
+    if fn is None:
+        return functools.partial(profiled, label=label)
+    name = label or f"{fn.__module__}.{fn.__qualname__}"
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not PROFILE:
+            return fn(*args, **kwargs)
+        with profile(name, rows(list(args) + list(kwargs.values()))) as record:
+            result = fn(*args, **kwargs)
+            record["rows_out"] = rows(result)
+        return result
+    return wrapper
+
+
+def profile_records():
+    with _lock:
+        return pd.DataFrame(list(RECORDS), columns=PROFILE_FIELDS)
+
+
+def profile_summary(records=None):
+    """Per label: calls, total/mean/p95/max wall time, mean rows and max peak, costliest first."""
+    records = profile_records() if records is None else records
+    if records.empty:
+        return pd.DataFrame(columns=["label", "calls", "total_ms", "mean_ms", "p95_ms", "max_ms",
+                                     "rows_in", "rows_out", "peak_kb"])
+    grouped = records.groupby("label")
+    summary = grouped.agg(
+        calls=("wall_ms", "size"),
+        total_ms=("wall_ms", "sum"),
+        mean_ms=("wall_ms", "mean"),
+        p95_ms=("wall_ms", lambda ms: ms.quantile(0.95)),
+        max_ms=("wall_ms", "max"),
+        rows_in=("rows_in", "mean"),
+        rows_out=("rows_out", "mean"),
+        peak_kb=("peak_kb", "max"),
+    )
+    return summary.sort_values("total_ms", ascending=False).round(2).reset_index()
+
+
+def clear_profile():
+    with _lock:
+        RECORDS.clear()
+
+
+def profiler_panel():
+    """Sidebar panel for admins: cost per label in this process, costliest first."""
+    with st.sidebar.expander("⏱️ Profiler"):
+        summary = profile_summary()
+        sort = st.selectbox("Sort by", ["total_ms", "p95_ms", "max_ms", "mean_ms", "peak_kb", "calls"],
+                            key="profiler_sort")
+        st.dataframe(summary.sort_values(sort, ascending=False), hide_index=True)
+        records = profile_records()
+        col1, col2 = st.columns(2)
+        col1.download_button("CSV", records.to_csv(index=False), "profile.csv", "text/csv")
+        col2.download_button("JSON", records.to_json(orient="records"), "profile.json", "application/json")
+        if PROFILE_LOG:
+            st.caption(f"Calls are also appended to {PROFILE_LOG} after each rerun")
+        if st.button("Clear profile"):
+            clear_profile()
@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+
+# Typed schemas for the CSVs in Data/
+# Every export uses day-first timestamps like "19-03-2012 10:42"
+DATE_FORMAT = "%d-%m-%Y %H:%M"
+
+# Bump this whenever the schemas below change so old caches get rebuilt
+SCHEMA_VERSION = 1
+
+# Columns are only converted when they exist in the file, so a table missing
+# one of them still loads.
+TABLE_SCHEMAS = {
+    "orders360.csv": {
+        "datetimes": ["order_date", "session_created_at", "first_order_date"],
+        "categories": ["utm_source", "utm_campaign", "utm_content", "device_type",
+                       "product_name", "http_referer"],
+        "ids": ["order_id", "user_id", "website_session_id", "product_id", "primary_product_id"],
+        "periods": "order_date",
+    },
+    "order_items.csv": {
+        "datetimes": ["created_at"],
+        "categories": [],
+        "ids": ["order_item_id", "order_id", "product_id"],
+    },
+    "order_item_refunds.csv": {
+        "datetimes": ["created_at"],
+        "categories": [],
+        "ids": ["order_item_refund_id", "order_item_id", "order_id"],
+    },
+    "products.csv": {
+        "datetimes": ["created_at"],
+        "categories": ["product_name"],
+        "ids": ["product_id"],
+    },
+    "website_pageviews.csv": {
+        "datetimes": ["created_at"],
+        "categories": ["pageview_url"],
+        "ids": ["website_pageview_id", "website_session_id"],
+    },
+    "websitesession360.csv": {
+        "datetimes": ["session_created_at", "session_end"],
+        "categories": ["utm_source", "utm_campaign", "utm_content", "device_type",
+                       "http_referer", "funnel_stage", "landing_page"],
+        "ids": ["website_session_id", "user_id"],
+        "periods": "session_created_at",
+    },
+    "customers360.csv": {
+        "datetimes": ["first_session_date", "first_order_date", "last_order_date"],
+        "categories": ["first_utm_source", "first_device_type"],
+        "ids": ["user_id"],
+    },
+}
+
+
+def parse_datetime(values):
+    # Explicit format first, anything that does not match falls back to a day-first parse
+    parsed = pd.to_datetime(values, format=DATE_FORMAT, errors="coerce")
+    missed = parsed.isna() & values.notna()
+    if missed.any():
+        parsed[missed] = pd.to_datetime(values[missed], dayfirst=True, errors="coerce")
+    return parsed
+
+
+def to_id(values):
+    # int32 ids, nullable Int32 when the column has gaps
+    if values.isna().any():
+        return values.astype("Int32")
+    return values.astype(np.int32)
+
+
+def apply_schema(df, filename):
+    schema = TABLE_SCHEMAS.get(filename)
+    # Some exports carry a UTF-8 BOM on the first header
+    df.columns = df.columns.str.lstrip("\ufeff")
+    if schema is None:
+        return df
+
+    for col in schema["datetimes"]:
+        if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = parse_datetime(df[col])
+    for col in schema["categories"]:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    for col in schema["ids"]:
+        if col in df.columns and pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = to_id(df[col])
+    return df
+
+
+# 0/1 columns that become bool in compact mode
+FLAG_COLUMNS = ["is_bounce", "is_repeat_session", "is_primary_item"]
+# Strings repeating at least this often per distinct value become categories
+CATEGORY_MIN_REPEAT = 2
+
+
+def compact_dtypes(df, filename):
+    """Shrink a typed table in place: bool flags, float32 numbers, downcast counts,
+    category for repetitive strings. Ids keep their int32 from apply_schema.
+    """
+    ids = set(TABLE_SCHEMAS.get(filename, {}).get("ids", []))
+    for col in df.columns:
+        values = df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype) or col in ids:
+            continue
+        if col in FLAG_COLUMNS and values.notna().all() and values.isin([0, 1]).all():
+            df[col] = values.astype(bool)
+        elif pd.api.types.is_float_dtype(values):
+            df[col] = values.astype(np.float32)
+        elif pd.api.types.is_integer_dtype(values) and isinstance(values.dtype, np.dtype):
+            df[col] = pd.to_numeric(values, downcast="integer")
+        elif pd.api.types.is_string_dtype(values) and values.nunique() * CATEGORY_MIN_REPEAT <= len(values):
+            df[col] = values.astype("category")
+    return df
+
+
+def add_period_columns(df, filename):
+    """Add year_month / year_quarter periods derived from the table's main timestamp."""
+    source = TABLE_SCHEMAS.get(filename, {}).get("periods")
+    if source is None or source not in df.columns:
+        return df
+    df["year_month"] = df[source].dt.to_period("M")
+    df["year_quarter"] = df[source].dt.to_period("Q")
+    return df
+
+
+def fill_label(values, fill, missing=("NULL", "")):
+    """Replace NaN and placeholder labels with `fill`, keeping categoricals categorical."""
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        return values.replace(list(missing), fill).fillna(fill)
+
+    # Remap category codes instead of touching every row as a string
+    cats = values.cat.categories
+    relabeled = cats.where(~cats.isin(list(missing)), fill)
+    new_cats = pd.Index(relabeled.append(pd.Index([fill])).unique())
+    mapper = new_cats.get_indexer(relabeled)
+    codes = values.cat.codes.to_numpy()
+    new_codes = np.where(codes >= 0, mapper[codes], new_cats.get_loc(fill))
+    return pd.Series(pd.Categorical.from_codes(new_codes, new_cats), index=values.index, name=values.name)
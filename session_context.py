@@ -0,0 +1,39 @@
+import streamlit as st
+
+from data_loader import get_dataset
+
+
+class SessionContext:
+    """What one browser session keeps between reruns: small handles, never frames.
+
+    The tables and aggregates live once per process (the dataset store and the
+    cached wrappers in data_loader); a session only remembers which dataset
+    version it is on, its filter selections and the keys of the aggregates it
+    asked for, so its state stays a few hundred bytes whatever the data size.
+    """
+
+    def __init__(self, version):
+        self.version = version
+        self.filters = {}
+        self.aggregate_keys = {}
+
+    def set_filters(self, page, **values):
+        self.filters[page] = values
+
+    def fetch(self, cached, *args, **kwargs):
+        """`cached(version, *args, **kwargs)` from the process-wide cache; only the key is kept."""
+        self.aggregate_keys[cached.__name__] = (args, tuple(sorted(kwargs.items())))
+        return cached(self.version, *args, **kwargs)
+
+
+def session_context():
+    """This session's context, moved to the store's current dataset version on each rerun."""
+    version = get_dataset().version
+    context = st.session_state.get("context")
+    if context is None:
+        context = st.session_state["context"] = SessionContext(version)
+    elif context.version != version:
+        # Keys of the previous version point at aggregates that no longer match
+        context.version = version
+        context.aggregate_keys.clear()
+    return context
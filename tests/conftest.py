@@ -0,0 +1,25 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+PAGES = ["/home", "/products", "/the-original-mr-fuzzy", "/cart", "/shipping", "/billing", "/thank-you"]
+
+
+@pytest.fixture
+def pageviews():
+    """A few hundred sessions walking the funnel, rows shuffled."""
+    rng = np.random.default_rng(7)
+    rows = []
+    for session in range(1, 301):
+        created = pd.Timestamp("2014-01-01") + pd.Timedelta(minutes=int(rng.integers(0, 100_000)))
+        for step in range(int(rng.integers(1, 6))):
+            created += pd.Timedelta(seconds=int(rng.integers(5, 600)))
+            rows.append((session, created, PAGES[int(rng.integers(0, min(step + 2, len(PAGES))))]))
+    frame = pd.DataFrame(rows, columns=["website_session_id", "created_at", "pageview_url"])
+    return frame.sample(frac=1, random_state=0).reset_index(drop=True)
+
+
+def joined_paths(pageviews):
+    """The pandas path strings the path engine replaced, per session."""
+    ordered = pageviews.sort_values(["website_session_id", "created_at"])
+    return ordered.groupby("website_session_id")["pageview_url"].apply(lambda x: ' → '.join(x))
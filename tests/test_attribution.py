@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics.attribution import ATTRIBUTION_MODELS, HALF_LIFE_DAYS, Touchpoints, attribute
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(11)
+    n_sessions, n_orders = 600, 150
+    start = pd.Timestamp("2014-01-01")
+    sessions = pd.DataFrame({
+        "website_session_id": np.arange(1, n_sessions + 1),
+        "user_id": rng.integers(0, 100, n_sessions),
+        "session_created_at": start + pd.to_timedelta(rng.integers(0, 90 * 24 * 60, n_sessions), unit="min"),
+        "utm_source": rng.choice(["gsearch", "bsearch", "socialbook", None], n_sessions),
+    })
+    orders = pd.DataFrame({
+        "order_id": np.arange(n_orders),
+        # A few users never had a session
+        "user_id": rng.integers(0, 110, n_orders),
+        "order_date": start + pd.to_timedelta(rng.integers(0, 90 * 24 * 60, n_orders), unit="min"),
+        "price_usd": rng.integers(20, 60, n_orders).astype(float),
+    })
+    return orders, sessions
+
+
+def pandas_attribution(orders, sessions, model):
+    """Per (order, prior session) weights with merge and groupby, summed per channel."""
+    touches = orders.merge(sessions, on="user_id")
+    touches = touches[touches["session_created_at"] <= touches["order_date"]]
+    touches = touches.sort_values(["order_id", "session_created_at", "website_session_id"], ignore_index=True)
+    by_order = touches.groupby("order_id")
+    touch = by_order.cumcount()
+    length = by_order["order_id"].transform("size")
+    age_days = (touches["order_date"] - touches["session_created_at"]).dt.total_seconds() / 86400
+    weight = {
+        "first_touch": (touch == 0).astype(float),
+        "last_touch": (touch == length - 1).astype(float),
+        "linear": 1.0 / length,
+        "time_decay": 2.0 ** (-age_days / HALF_LIFE_DAYS),
+        "position_based": pd.Series(np.select(
+            [length == 1, length == 2, (touch == 0) | (touch == length - 1)],
+            [1.0, 0.5, 0.4], 0.2 / (length - 2).clip(lower=1))),
+    }[model]
+    weight = weight / weight.groupby(touches["order_id"]).transform("sum")
+    channel = touches["utm_source"].fillna("Direct")
+    return pd.DataFrame({
+        "attributed_orders": weight.groupby(channel).sum(),
+        "attributed_revenue": (weight * touches["price_usd"]).groupby(channel).sum(),
+    }), touches["order_id"].nunique()
+
+
+@pytest.mark.parametrize("model", list(ATTRIBUTION_MODELS))
+def test_matches_pandas_and_weights_sum_to_one(data, model):
+    orders, sessions = data
+    result = attribute(orders, Touchpoints(sessions), model).set_index("utm_source")
+    expected, matched = pandas_attribution(orders, sessions, model)
+
+    assert set(result.index) == set(expected.index[expected["attributed_orders"] > 0])
+    expected = expected.reindex(result.index)
+    np.testing.assert_allclose(result["attributed_orders"], expected["attributed_orders"])
+    np.testing.assert_allclose(result["attributed_revenue"], expected["attributed_revenue"])
+    # Every order with a prior session hands out exactly one order's worth of credit
+    assert result["attributed_orders"].sum() == pytest.approx(matched)
+    assert result.attrs["unattributed_orders"] == len(orders) - matched
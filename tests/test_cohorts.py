@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+from analytics.cohorts import Cohorts, acquisition
+from analytics.order_sequence import add_order_sequence
+
+
+def orders(n=400, seed=3):
+    rng = np.random.default_rng(seed)
+    order_date = pd.Timestamp("2013-01-01") + pd.to_timedelta(rng.integers(0, 540, n), unit="D")
+    df = pd.DataFrame({
+        "order_id": np.arange(n),
+        "user_id": rng.integers(0, 120, n),
+        "order_date": order_date,
+        "utm_source": rng.choice(["gsearch", "bsearch"], n),
+        "price_usd": rng.integers(20, 60, n).astype(float),
+        "cogs_usd": rng.integers(5, 20, n).astype(float),
+        "refund_amount_usd": np.where(rng.random(n) < 0.1, 10.0, np.nan),
+    })
+    df["year_month"] = df["order_date"].dt.to_period("M")
+    return add_order_sequence(df)
+
+
+def pandas_matrix(orders):
+    """The cohort pivot the way plain pandas would compute it."""
+    first = orders[orders["is_first_order"]].set_index("user_id")["year_month"]
+    df = orders.assign(cohort=orders["user_id"].map(first)).dropna(subset=["cohort", "year_month"])
+    df["age"] = (df["year_month"] - df["cohort"]).apply(lambda offset: offset.n)
+    df["margin"] = df["price_usd"] - df["cogs_usd"] - df["refund_amount_usd"].fillna(0)
+    return df.groupby(["cohort", "age"]).agg(active_users=("user_id", "nunique"), orders=("order_id", "size"),
+                                             revenue=("price_usd", "sum"), margin=("margin", "sum"))
+
+
+def assert_matches(cohorts, orders):
+    expected = pandas_matrix(orders)
+    for measure in ("active_users", "orders", "revenue", "margin"):
+        frame = cohorts.frame(measure)
+        grid = expected[measure].unstack(fill_value=0)
+        grid.index = grid.index.astype(str)
+        grid = grid.reindex(index=frame.index, columns=frame.columns, fill_value=0)
+        np.testing.assert_allclose(frame.to_numpy(), grid.where(frame.notna()).to_numpy())
+    sizes = orders[orders["is_first_order"]].groupby("year_month").size()
+    assert cohorts.sizes[cohorts.sizes > 0].tolist() == sizes.tolist()
+
+
+def test_matrices_match_pandas_pivot():
+    df = orders()
+    assert_matches(Cohorts.build(df, acquisition(df, None)), df)
+
+
+def test_missing_dates_are_left_out():
+    df = orders()
+    # One user with only an undated order, one dated user with an extra undated order
+    undated = df.iloc[:2].assign(order_id=[1000, 1001], user_id=[500, 0], order_date=pd.NaT)
+    df = add_order_sequence(pd.concat([df, undated.assign(year_month=pd.NaT)], ignore_index=True))
+    df["year_month"] = df["year_month"].astype("period[M]")
+    acquired = acquisition(df, None)
+
+    assert 500 not in acquired["user_id"].tolist()
+    cohorts = Cohorts.build(df, acquired)
+    assert len(cohorts.months) < 24
+    assert_matches(cohorts, df[df["order_date"].notna()])
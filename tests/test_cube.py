@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics.cube import Cube
+
+DIMS = ["utm_source", "device_type", "year_month"]
+SUMS = ["price_usd"]
+DISTINCT = ["order_id", "user_id", "website_session_id"]
+
+
+def orders(n, seed, first_id=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "utm_source": pd.Categorical(rng.choice(["g", "b", None], n)),
+        "device_type": pd.Categorical(rng.choice(["m", "d"], n)),
+        "year_month": pd.PeriodIndex(rng.choice(["2014-01", "2014-02", "2014-03"], n), freq="M"),
+        "price_usd": rng.integers(10, 60, n).astype(float),
+        "order_id": np.arange(first_id, first_id + n),
+        "user_id": rng.integers(0, n // 3, n),
+        "website_session_id": np.arange(first_id, first_id + n) * 10,
+    })
+
+
+def build(df):
+    return Cube.build(df, DIMS, SUMS, DISTINCT)
+
+
+def assert_same(cube, df):
+    for by in (["utm_source"], ["device_type", "year_month"], ["year_quarter"]):
+        grouped = df.assign(year_quarter=df["year_month"].dt.asfreq("Q")).groupby(by, observed=True)
+        expected = grouped.agg(price_usd=("price_usd", "sum"),
+                               **{col: (col, "nunique") for col in DISTINCT}).reset_index()
+        result = cube.rollup(by, sums=SUMS, distinct=DISTINCT)
+        pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+    for col in DISTINCT:
+        assert cube.total(col) == df[col].nunique()
+    assert cube.total("price_usd") == df["price_usd"].sum()
+
+
+def test_rollup_matches_groupby():
+    df = orders(300, seed=1)
+    cube = build(df)
+    # Orders and sessions sit in one cell each, users repeat across cells
+    assert cube.exclusive == ["order_id", "website_session_id"]
+    assert_same(cube, df)
+
+
+def test_slice_matches_filtered_rows():
+    df = orders(300, seed=2)
+    sliced = build(df).slice(utm_source=["g"], device_type=["m", "d"], year_month=[])
+    assert_same(sliced, df[df["utm_source"] == "g"])
+
+
+def overlapping_batches():
+    old = pd.DataFrame({
+        "utm_source": pd.Categorical(["g", "g"]), "device_type": pd.Categorical(["m", "m"]),
+        "year_month": pd.PeriodIndex(["2014-01", "2014-01"], freq="M"), "price_usd": [10.0, 20.0],
+        "order_id": [1, 2], "user_id": [10, 11], "website_session_id": [100, 101],
+    })
+    # User 10 orders again in the same cell; order 3 belongs to session 100, already in the data
+    new = pd.DataFrame({
+        "utm_source": pd.Categorical(["g"]), "device_type": pd.Categorical(["m"]),
+        "year_month": pd.PeriodIndex(["2014-01"], freq="M"), "price_usd": [30.0],
+        "order_id": [3], "user_id": [10], "website_session_id": [100],
+    })
+    return old, new
+
+
+@pytest.mark.parametrize("batches", ["overlapping", "disjoint", "random"])
+def test_merge_matches_rebuild(batches):
+    if batches == "overlapping":
+        old, new = overlapping_batches()
+    elif batches == "disjoint":
+        old, new = orders(200, seed=3), orders(50, seed=4, first_id=10_000)
+        new = new.assign(user_id=new["user_id"] + 10_000)
+    else:
+        old, new = orders(200, seed=5), orders(50, seed=6, first_id=10_000)
+    grown = pd.concat([old, new], ignore_index=True)
+    merged = build(old).merge(build(new), grown)
+    rebuilt = build(grown)
+
+    # Counts are only added up for ids a rebuild also finds in a single cell
+    assert set(merged.exclusive) <= set(rebuilt.exclusive)
+    assert_same(merged, grown)
+    for by in (["year_month"], ["utm_source", "device_type"]):
+        pd.testing.assert_frame_equal(merged.rollup(by, sums=SUMS, distinct=DISTINCT),
+                                      rebuilt.rollup(by, sums=SUMS, distinct=DISTINCT), check_dtype=False)
+
+
+def test_overlapping_ids_are_not_summed():
+    old, new = overlapping_batches()
+    grown = pd.concat([old, new], ignore_index=True)
+    merged = build(old).merge(build(new), grown)
+    assert "website_session_id" not in merged.exclusive
+    month = merged.rollup(["year_month"], distinct=["user_id", "website_session_id"])
+    assert month[["user_id", "website_session_id"]].values.tolist() == [[2, 2]]
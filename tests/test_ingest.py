@@ -0,0 +1,77 @@
+import os
+
+import pandas as pd
+import pytest
+
+import ingest
+from dataset import Dataset
+from schema import add_period_columns, apply_schema
+
+FILENAME = "website_pageviews.csv"
+
+
+def pageview_rows(ids):
+    return pd.DataFrame({
+        "website_pageview_id": ids,
+        "created_at": [f"{1 + i % 28:02d}-03-2014 10:{i % 60:02d}" for i in ids],
+        "website_session_id": [i // 3 for i in ids],
+        "pageview_url": ["/home" if i % 2 else "/products" for i in ids],
+    })
+
+
+def read_typed(data_dir):
+    return add_period_columns(apply_schema(pd.read_csv(os.path.join(data_dir, FILENAME)), FILENAME), FILENAME)
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    pageview_rows(list(range(1, 11))).to_csv(tmp_path / FILENAME, index=False)
+    os.makedirs(tmp_path / ingest.INCOMING_DIRNAME)
+    return tmp_path
+
+
+def drop(data_dir, name, rows):
+    rows.to_csv(data_dir / ingest.INCOMING_DIRNAME / name, index=False)
+
+
+def ingest_all(data_dir, dataset):
+    return ingest.ingest_pending(dataset, str(data_dir), {"pageviews": FILENAME})
+
+
+def test_dedup_matches_concat_drop_duplicates(data_dir):
+    old = pageview_rows(list(range(1, 11)))
+    # Overlaps the existing ids and repeats one of its own
+    new = pageview_rows([8, 9, 10, 11, 12, 12, 13])
+    drop(data_dir, "pageviews-day1.csv", new)
+
+    dataset, added, skipped = ingest_all(data_dir, Dataset({"pageviews": read_typed(data_dir)}, "v"))
+    expected = pd.concat([old, new]).drop_duplicates(subset="website_pageview_id", ignore_index=True)
+
+    assert added == {"pageviews": 3} and skipped == []
+    table = dataset.table("pageviews")
+    assert table["website_pageview_id"].tolist() == expected["website_pageview_id"].tolist()
+    # The CSV is still the source of truth: reading it back gives the same rows
+    pd.testing.assert_frame_equal(read_typed(data_dir), table.reset_index(drop=True), check_dtype=False,
+                                  check_categorical=False)
+    assert os.path.exists(data_dir / ingest.INCOMING_DIRNAME / "done" / "pageviews-day1.csv")
+
+
+def test_redropped_file_adds_nothing(data_dir):
+    drop(data_dir, "pageviews-day1.csv", pageview_rows([11, 12]))
+    dataset, added, _ = ingest_all(data_dir, Dataset({"pageviews": read_typed(data_dir)}, "v"))
+    drop(data_dir, "pageviews-day1.csv", pageview_rows([11, 12]))
+    again, added_again, _ = ingest_all(data_dir, dataset)
+
+    assert added == {"pageviews": 2} and added_again == {}
+    assert again is dataset
+    assert len(read_typed(data_dir)) == 12
+
+
+def test_unknown_files_are_returned_not_moved(data_dir):
+    drop(data_dir, "visitors-day1.csv", pageview_rows([20]))
+    dataset = Dataset({"pageviews": read_typed(data_dir)}, "v")
+    _, added, skipped = ingest_all(data_dir, dataset)
+
+    assert added == {}
+    assert skipped == [str(data_dir / ingest.INCOMING_DIRNAME / "visitors-day1.csv")]
+    assert os.path.exists(skipped[0])
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+from analytics.path_trie import PathTrie
+from analytics.paths import SEPARATOR, build_session_paths
+from conftest import joined_paths
+
+
+def expected_node(paths, converted, durations, prefix):
+    reached = (paths == prefix) | paths.str.startswith(prefix + SEPARATOR)
+    return {
+        "sessions": int(reached.sum()),
+        "ended": int((paths == prefix).sum()),
+        "conversions": int(converted[reached].sum()),
+        "duration_sum": durations[reached].sum(),
+    }
+
+
+def prefixes(paths):
+    pages = paths.str.split(SEPARATOR)
+    return {SEPARATOR.join(p[:i]) for p in pages for i in range(1, len(p) + 1)}
+
+
+def assert_matches(trie, pageviews, converted_ids):
+    paths = joined_paths(pageviews)
+    created = pageviews.groupby("website_session_id")["created_at"]
+    durations = ((created.max() - created.min()).dt.total_seconds() / 60).reindex(paths.index)
+    converted = pd.Series(paths.index.isin(converted_ids), index=paths.index)
+
+    labels = {trie.label(node): node for node in range(1, len(trie.pages))}
+    assert set(labels) == prefixes(paths)
+    for prefix, node in labels.items():
+        expected = expected_node(paths, converted, durations, prefix)
+        assert trie.sessions[node] == expected["sessions"]
+        assert trie.ended[node] == expected["ended"]
+        assert trie.conversions[node] == expected["conversions"]
+        assert np.isclose(trie.duration_sum[node], expected["duration_sum"])
+    assert trie.sessions[0] == len(paths)
+
+
+def test_counts_match_joined_paths(pageviews):
+    converted = np.arange(1, 301, 4)
+    trie = PathTrie.build(build_session_paths(pageviews), converted)
+    assert_matches(trie, pageviews, converted)
+
+
+def test_slice_has_only_paths_it_contains(pageviews):
+    paths = build_session_paths(pageviews)
+    # A slice keeps the full path dictionary; paths no session of it took are left out
+    sliced = paths[paths["website_session_id"] % 3 == 0]
+    trie = PathTrie.build(sliced, [3, 9, 30])
+    assert_matches(trie, pageviews[pageviews["website_session_id"] % 3 == 0], [3, 9, 30])
+    assert (trie.sessions[1:] > 0).all()
+    for node in range(len(trie.pages)):
+        assert (trie.children(node)["sessions"] > 0).all()
+
+
+def test_drop_off(pageviews):
+    trie = PathTrie.build(build_session_paths(pageviews))
+    stats = trie.drop_off(["/home"])
+    assert stats["reached"] == trie.sessions[trie.find(["/home"])]
+    assert stats["continued"] == stats["reached"] - stats["dropped"]
+    assert trie.drop_off(["/nowhere"]) is None
@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+
+from analytics.paths import build_session_paths, short_labels
+from conftest import joined_paths
+
+
+def test_paths_match_groupby_join(pageviews):
+    paths = build_session_paths(pageviews)
+    expected = joined_paths(pageviews)
+
+    assert paths["website_session_id"].tolist() == expected.index.tolist()
+    assert paths["pageview_url"].astype(str).tolist() == expected.tolist()
+    created = pageviews.groupby("website_session_id")["created_at"]
+    minutes = (created.max() - created.min()).dt.total_seconds() / 60
+    np.testing.assert_allclose(paths["session_duration_min"], minutes.to_numpy())
+
+
+def test_identical_paths_share_one_id(pageviews):
+    paths = build_session_paths(pageviews)
+    dictionary = paths["pageview_url"].cat.categories
+
+    assert dictionary.is_unique
+    assert (dictionary[paths["path_id"]] == paths["pageview_url"].astype(str)).all()
+    assert paths.groupby("pageview_url", observed=True)["path_id"].nunique().eq(1).all()
+
+
+def test_short_labels_match_apply():
+    dictionary = pd.Index(["/home", "/home → " + "/products → " * 10])
+    expected = [p if len(p) <= 60 else p[:60] + '...' for p in dictionary]
+    assert short_labels(dictionary).tolist() == expected
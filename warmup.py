@@ -0,0 +1,100 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from analytics.attribution import ATTRIBUTION_MODELS, touchpoints
+from analytics.cohorts import acquisition_for
+from analytics.cube import order_cube, session_cube
+from analytics.session_features import session_features
+from analytics.session_index import order_index, pageview_index, session_index, session_sets
+from data_loader import attribution_for, cohorts_for, get_dataset, path_trie_for, session_paths, session_paths_for
+
+# numpy/pandas release the GIL in their inner loops, so a few threads overlap well
+WARMUP_WORKERS = int(os.environ.get("DASHBOARD_WARMUP_WORKERS", min(4, os.cpu_count() or 1)))
+
+
+def _default_date_range(dataset):
+    # Same default as the Marketing sidebar slider, so the cache keys match
+    order_date = dataset.table("orders")["order_date"]
+    return order_date.min().to_pydatetime(), order_date.max().to_pydatetime()
+
+
+def _default_selection():
+    return (("product_name", ()), ("utm_source", ()), ("device_type", ()))
+
+
+def warmup_tasks(dataset):
+    """(label, callable) pairs building every aggregate behind the unfiltered views."""
+    version = dataset.version
+    return [
+        # Shared structures first: later tasks reuse them instead of waiting on their own build
+        ("Session index", lambda: session_index(dataset)),
+        ("Pageview index", lambda: pageview_index(dataset)),
+        ("Order index", lambda: order_index(dataset)),
+        ("Session sets", lambda: session_sets(dataset)),
+        ("Order cube", lambda: order_cube(dataset)),
+        ("Session cube", lambda: session_cube(dataset)),
+        ("Session features", lambda: session_features(dataset)),
+        ("Session paths", lambda: session_paths(dataset)),
+        ("Touchpoints", lambda: touchpoints(dataset)),
+        ("Acquisition", lambda: acquisition_for(dataset, "order")),
+        ("Marketing paths", lambda: session_paths_for(version, _default_date_range(dataset), ())),
+        ("Path trie", lambda: path_trie_for(version, _default_date_range(dataset), (), _default_selection())),
+        # Every model: the Marketing comparison chart shows them side by side
+        ("Attribution", lambda: [attribution_for(version, model, "utm_source", _default_selection(),
+                                                 _default_date_range(dataset)) for model in ATTRIBUTION_MODELS]),
+        ("Cohorts", lambda: cohorts_for(version, "order", ())),
+    ]
+
+
+class Warmup:
+    """Runs the warm-up tasks of one dataset on a thread pool and counts progress.
+
+    Aggregates land where the tabs look for them (Dataset.derived and the
+    cached wrappers in data_loader); a tab that needs one still being built
+    waits for that build instead of starting its own.
+    """
+
+    def __init__(self, dataset, workers=WARMUP_WORKERS):
+        tasks = warmup_tasks(dataset)
+        self.version = dataset.version
+        self.total = len(tasks)
+        self.done = 0
+        self.errors = {}
+        self._lock = threading.Lock()
+        pool = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="warmup")
+        for label, task in tasks:
+            pool.submit(self._run, label, task)
+        pool.shutdown(wait=False)
+
+    def _run(self, label, task):
+        try:
+            task()
+        except Exception as e:
+            # A failed task is simply built on demand later
+            self.errors[label] = repr(e)
+        finally:
+            with self._lock:
+                self.done += 1
+
+    @property
+    def finished(self):
+        return self.done >= self.total
+
+
+# One warm-up per dataset version and process; a refresh starts a new one
+@st.cache_resource(show_spinner=False, max_entries=2)
+def start_warmup(version):
+    return Warmup(get_dataset())
+
+
+@st.fragment(run_every=1.0)
+def warmup_progress():
+    """Sidebar progress bar, polled until the current dataset is warm."""
+    warmup = start_warmup(get_dataset().version)
+    if warmup.finished:
+        # A full rerun drops this fragment and its polling
+        st.rerun()
+    st.progress(warmup.done / warmup.total, text=f"Warming up dashboards… {warmup.done}/{warmup.total}")